@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from accounts.stats import rebuild_user_stats
+from accounts.streaks import rebuild_user_streaks
+
+
+class Command(BaseCommand):
+    help = 'Recalcula a tabela de estatísticas dos usuários (contadores e sequências) a partir das partidas, jogadas e conquistas'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('user_ids', nargs='*', help='Ids dos usuários (padrão: todos)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        user_ids = options['user_ids'] or None
+        total = rebuild_user_stats(user_ids, batch_size=options['batch_size'])
+        rebuild_user_streaks(user_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Estatísticas recalculadas para {total} usuário(s).'))
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_user_stats(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    UserStats = apps.get_model('accounts', 'UserStats')
+    MatchPlayer = apps.get_model('matches', 'MatchPlayer')
+    Move = apps.get_model('matches', 'Move')
+    UserAchievement = apps.get_model('achievements', 'UserAchievement')
+
+    stats = {user_id: UserStats(user_id=user_id) for user_id in User.objects.values_list('pk', flat=True)}
+
+    players = MatchPlayer.objects.values('user_id').annotate(
+        matches=Count('id'),
+        wins=Count('id', filter=Q(is_winner=True)),
+        points=Sum('points'),
+        last_played=Max(Coalesce('match__ended_at', 'match__started_at'))
+    )
+    for row in players:
+        row_stats = stats[row['user_id']]
+        row_stats.total_matches = row['matches']
+        row_stats.total_wins = row['wins']
+        row_stats.total_points = row['points'] or 0
+        row_stats.last_played_at = row['last_played']
+
+    for row in Move.objects.values('player__user_id').annotate(total=Count('id')):
+        stats[row['player__user_id']].total_moves = row['total']
+
+    for row in UserAchievement.objects.values('user_id').annotate(total=Count('id')):
+        stats[row['user_id']].total_achievements = row['total']
+
+    UserStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('matches', '0001_initial'),
+        ('achievements', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_matches', models.PositiveIntegerField(default=0)),
+                ('total_wins', models.PositiveIntegerField(default=0)),
+                ('total_points', models.IntegerField(default=0, help_text='Soma dos pontos em todas as partidas')),
+                ('total_moves', models.PositiveIntegerField(default=0)),
+                ('total_achievements', models.PositiveIntegerField(default=0)),
+                ('last_played_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estatísticas do Usuário',
+                'verbose_name_plural': 'Estatísticas dos Usuários',
+                'db_table': 'user_stats',
+            },
+        ),
+        migrations.RunPython(backfill_user_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:45
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_streaks(apps, schema_editor):
+    UserStats = apps.get_model('accounts', 'UserStats')
+    MatchPlayer = apps.get_model('matches', 'MatchPlayer')
+
+    stats = {row.user_id: row for row in UserStats.objects.all()}
+    previous = {}
+
+    rows = MatchPlayer.objects.filter(match__status='finalizada').order_by(
+        'user_id', 'match__started_at', 'match_id'
+    ).values_list('user_id', 'match__started_at', 'is_winner')
+
+    for user_id, started_at, is_winner in rows.iterator():
+        row = stats.get(user_id)
+        if row is None:
+            continue
+        last = previous.get(user_id)
+        if last is None:
+            row.day_streak = row.session_streak = 1
+        else:
+            day, last_day = timezone.localtime(started_at).date(), timezone.localtime(last).date()
+            if day == last_day + timedelta(days=1):
+                row.day_streak += 1
+            elif day != last_day:
+                row.day_streak = 1
+            row.session_streak = row.session_streak + 1 if started_at - last <= timedelta(hours=2) else 1
+        row.win_streak = row.win_streak + 1 if is_winner else 0
+        row.best_day_streak = max(row.best_day_streak, row.day_streak)
+        row.best_session_streak = max(row.best_session_streak, row.session_streak)
+        row.best_win_streak = max(row.best_win_streak, row.win_streak)
+        row.last_streak_match_started_at = started_at
+        previous[user_id] = started_at
+
+    UserStats.objects.bulk_update(
+        stats.values(),
+        [
+            'day_streak', 'best_day_streak', 'session_streak', 'best_session_streak',
+            'win_streak', 'best_win_streak', 'last_streak_match_started_at',
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_userstats'),
+        ('matches', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='best_day_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='best_session_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='best_win_streak',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='day_streak',
+            field=models.PositiveIntegerField(default=0, help_text='Dias consecutivos com partidas'),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='last_streak_match_started_at',
+            field=models.DateTimeField(blank=True, help_text='Início da última partida contabilizada nas sequências', null=True),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='session_streak',
+            field=models.PositiveIntegerField(default=0, help_text='Partidas seguidas, com até 2h entre os inícios'),
+        ),
+        migrations.AddField(
+            model_name='userstats',
+            name='win_streak',
+            field=models.PositiveIntegerField(default=0, help_text='Vitórias consecutivas'),
+        ),
+        migrations.RunPython(backfill_streaks, migrations.RunPython.noop),
+    ]
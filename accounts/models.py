@@ -22,24 +22,72 @@ class User(AbstractUser):
     def __str__(self):
         return self.display_name or self.email
     
+    def get_stats(self):
+        """Retorna a linha de estatísticas do usuário (recalculada se ainda não existir)"""
+        try:
+            return self.stats
+        except UserStats.DoesNotExist:
+            from .stats import rebuild_user_stats
+            rebuild_user_stats([self.pk])
+            self.stats = UserStats.objects.get(user=self)
+            return self.stats
+    
     @property
     def total_matches(self):
         """Retorna o total de partidas jogadas pelo usuário"""
-        return self.match_players.count()
+        return self.get_stats().total_matches
     
     @property
     def total_wins(self):
         """Retorna o total de vitórias do usuário"""
-        return self.match_players.filter(is_winner=True).count()
+        return self.get_stats().total_wins
     
     @property
     def total_achievements(self):
         """Retorna o total de conquistas desbloqueadas"""
-        return self.user_achievements.count()
+        return self.get_stats().total_achievements
+    
+    @property
+    def win_rate(self):
+        """Retorna a taxa de vitórias do usuário"""
+        return self.get_stats().win_rate
+
+
+class UserStats(models.Model):
+    """Estatísticas desnormalizadas do usuário, atualizadas a cada escrita"""
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    total_matches = models.PositiveIntegerField(default=0)
+    total_wins = models.PositiveIntegerField(default=0)
+    total_points = models.IntegerField(default=0, help_text="Soma dos pontos em todas as partidas")
+    total_moves = models.PositiveIntegerField(default=0)
+    total_achievements = models.PositiveIntegerField(default=0)
+    last_played_at = models.DateTimeField(null=True, blank=True)
+    
+    # Sequências (ver accounts.streaks): atual e melhor de cada tipo
+    day_streak = models.PositiveIntegerField(default=0, help_text="Dias consecutivos com partidas")
+    best_day_streak = models.PositiveIntegerField(default=0)
+    session_streak = models.PositiveIntegerField(default=0, help_text="Partidas seguidas, com até 2h entre os inícios")
+    best_session_streak = models.PositiveIntegerField(default=0)
+    win_streak = models.PositiveIntegerField(default=0, help_text="Vitórias consecutivas")
+    best_win_streak = models.PositiveIntegerField(default=0)
+    last_streak_match_started_at = models.DateTimeField(
+        null=True, blank=True, help_text="Início da última partida contabilizada nas sequências"
+    )
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'user_stats'
+        verbose_name = 'Estatísticas do Usuário'
+        verbose_name_plural = 'Estatísticas dos Usuários'
+    
+    def __str__(self):
+        return f"Estatísticas de {self.user_id}"
     
     @property
     def win_rate(self):
         """Retorna a taxa de vitórias do usuário"""
         if self.total_matches == 0:
             return 0
-        return (self.total_wins / self.total_matches) * 100
\ No newline at end of file
+        return (self.total_wins / self.total_matches) * 100
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from .models import User
+from .stats import UserStatsLoader
 
 
 class UserRegistrationSerializer(serializers.ModelSerializer):
@@ -44,7 +45,35 @@ class UserLoginSerializer(serializers.Serializer):
         return attrs
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserStatsListSerializer(serializers.ListSerializer):
+    """Lista que carrega de uma vez as estatísticas de todos os usuários exibidos nos itens"""
+    
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        UserStatsLoader.for_context(self.context).prime(
+            user for item in items for user in self.child.serialized_users(item)
+        )
+        return super().to_representation(items)
+
+
+class UserStatsBatchMixin:
+    """Serializers que exibem perfis de usuário (UserProfileSerializer).
+    
+    Antes de serializar, reúne os usuários da instância (serialized_users) e
+    carrega as estatísticas que faltam em uma única consulta; em listas, a
+    carga é feita uma vez para todos os itens (UserStatsListSerializer).
+    """
+    
+    def serialized_users(self, instance):
+        return []
+    
+    def to_representation(self, instance):
+        if not isinstance(self.parent, UserStatsListSerializer):
+            UserStatsLoader.for_context(self.context).prime(self.serialized_users(instance))
+        return super().to_representation(instance)
+
+
+class UserProfileSerializer(UserStatsBatchMixin, serializers.ModelSerializer):
     total_matches = serializers.ReadOnlyField()
     total_wins = serializers.ReadOnlyField()
     total_achievements = serializers.ReadOnlyField()
@@ -57,6 +86,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
             'created_at', 'total_matches', 'total_wins', 'total_achievements', 'win_rate'
         )
         read_only_fields = ('id', 'email', 'username', 'created_at')
+        list_serializer_class = UserStatsListSerializer
+    
+    def serialized_users(self, instance):
+        return [instance]
 
 
 class UserUpdateSerializer(serializers.ModelSerializer):
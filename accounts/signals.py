@@ -0,0 +1,86 @@
+from django.db.models import Subquery
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import User, UserStats
+from .stats import apply_stats_delta
+
+
+@receiver(post_save, sender=User)
+def user_created(sender, instance, created, **kwargs):
+    """Cria a linha de estatísticas do novo usuário"""
+    if created:
+        UserStats.objects.get_or_create(user=instance)
+
+
+def _match_started_at(player):
+    """Início da partida sem consulta extra: do objeto já carregado ou como subconsulta no UPDATE"""
+    if player._meta.get_field('match').is_cached(player):
+        return player.match.started_at
+    from matches.models import Match
+    return Subquery(Match.objects.filter(pk=player.match_id).values('started_at')[:1])
+
+
+def _player_user_id(move):
+    """Usuário do jogador da jogada, do objeto já carregado quando possível"""
+    if move._meta.get_field('player').is_cached(move):
+        return move.player.user_id
+    from matches.models import MatchPlayer
+    return MatchPlayer.objects.filter(pk=move.player_id).values_list('user_id', flat=True).first()
+
+
+@receiver(post_save, sender='matches.MatchPlayer')
+def match_player_saved(sender, instance, created, **kwargs):
+    """Atualiza partidas, vitórias e pontos do usuário"""
+    if created:
+        apply_stats_delta(
+            instance.user_id,
+            played_at=_match_started_at(instance),
+            total_matches=1,
+            total_wins=int(instance.is_winner),
+            total_points=instance.points
+        )
+    else:
+        # Valores carregados do banco (ver MatchPlayer.from_db)
+        loaded = getattr(instance, '_loaded_stats', None)
+        if loaded is not None:
+            was_winner, old_points = loaded
+            apply_stats_delta(
+                instance.user_id,
+                total_wins=int(instance.is_winner) - int(was_winner),
+                total_points=instance.points - old_points
+            )
+    instance._loaded_stats = (instance.is_winner, instance.points)
+
+
+@receiver(post_delete, sender='matches.MatchPlayer')
+def match_player_deleted(sender, instance, **kwargs):
+    apply_stats_delta(
+        instance.user_id,
+        total_matches=-1,
+        total_wins=-int(instance.is_winner),
+        total_points=-instance.points
+    )
+
+
+@receiver(post_save, sender='matches.Move')
+def move_saved(sender, instance, created, **kwargs):
+    if created:
+        apply_stats_delta(_player_user_id(instance), total_moves=1)
+
+
+@receiver(post_delete, sender='matches.Move')
+def move_deleted(sender, instance, **kwargs):
+    user_id = _player_user_id(instance)
+    if user_id is not None:
+        apply_stats_delta(user_id, total_moves=-1)
+
+
+@receiver(post_save, sender='achievements.UserAchievement')
+def user_achievement_saved(sender, instance, created, **kwargs):
+    if created:
+        apply_stats_delta(instance.user_id, total_achievements=1)
+
+
+@receiver(post_delete, sender='achievements.UserAchievement')
+def user_achievement_deleted(sender, instance, **kwargs):
+    apply_stats_delta(instance.user_id, total_achievements=-1)
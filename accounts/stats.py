@@ -0,0 +1,172 @@
+from typing import Iterable
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from .models import User, UserStats
+
+# Campos incrementais de UserStats
+COUNTER_FIELDS = ('total_matches', 'total_wins', 'total_points', 'total_moves', 'total_achievements')
+
+# Resposta de matches.views.match_stats em cache por usuário
+MATCH_STATS_CACHE_TIMEOUT = 60 * 10
+
+
+def match_stats_cache_key(user_id) -> str:
+    return f'matches:stats:{user_id}'
+
+
+def invalidate_match_stats(*user_ids) -> None:
+    """Descarta as estatísticas de partidas em cache após o commit da escrita"""
+    keys = [match_stats_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def apply_stats_delta(user_id, played_at=None, **deltas) -> None:
+    """Aplica incrementos atômicos (F) às estatísticas de um usuário.
+
+    Deve ser chamado dentro da mesma transação da escrita que o motivou.
+    """
+    updates = {
+        field: F(field) + delta
+        for field, delta in deltas.items()
+        if delta
+    }
+    if played_at is not None:
+        updates['last_played_at'] = _latest(played_at)
+    if updates:
+        UserStats.objects.filter(user_id=user_id).update(**updates)
+        invalidate_match_stats(user_id)
+
+
+def record_match_finished(match) -> None:
+    """Atualiza a data da última partida e as sequências dos jogadores ao finalizar a partida"""
+    from .streaks import record_match_streaks
+
+    user_ids = list(match.match_players.values_list('user_id', flat=True))
+    UserStats.objects.filter(user_id__in=user_ids).update(
+        last_played_at=_latest(match.ended_at)
+    )
+    record_match_streaks(match)
+    # A duração da partida entra nas estatísticas de partidas
+    invalidate_match_stats(*user_ids)
+
+
+def _latest(played_at):
+    """Mantém o maior valor entre a data atual e a nova data (valor ou expressão)"""
+    return Case(
+        When(
+            Q(last_played_at__isnull=True) | Q(last_played_at__lt=played_at),
+            then=played_at if hasattr(played_at, 'resolve_expression') else Value(played_at)
+        ),
+        default=F('last_played_at')
+    )
+
+
+def rebuild_user_stats(user_ids: Iterable = None, batch_size: int = 1000) -> int:
+    """Recalcula as estatísticas a partir das tabelas de origem.
+
+    Sem user_ids, recalcula todos os usuários. Retorna a quantidade de linhas gravadas.
+    """
+    from matches.models import MatchPlayer, Move
+    from achievements.models import UserAchievement
+
+    users = User.objects.order_by('pk')
+    if user_ids is not None:
+        users = users.filter(pk__in=list(user_ids))
+    all_ids = list(users.values_list('pk', flat=True))
+
+    written = 0
+    for start in range(0, len(all_ids), batch_size):
+        chunk = all_ids[start:start + batch_size]
+
+        players = MatchPlayer.objects.filter(user_id__in=chunk).values('user_id').annotate(
+            matches=Count('id'),
+            wins=Count('id', filter=Q(is_winner=True)),
+            points=Sum('points'),
+            last_played=Max(Coalesce('match__ended_at', 'match__started_at'))
+        )
+        moves = Move.objects.filter(player__user_id__in=chunk).values('player__user_id').annotate(
+            total=Count('id')
+        )
+        achievements = UserAchievement.objects.filter(user_id__in=chunk).values('user_id').annotate(
+            total=Count('id')
+        )
+
+        stats = {user_id: UserStats(user_id=user_id) for user_id in chunk}
+        for row in players:
+            row_stats = stats[row['user_id']]
+            row_stats.total_matches = row['matches']
+            row_stats.total_wins = row['wins']
+            row_stats.total_points = row['points'] or 0
+            row_stats.last_played_at = row['last_played']
+        for row in moves:
+            stats[row['player__user_id']].total_moves = row['total']
+        for row in achievements:
+            stats[row['user_id']].total_achievements = row['total']
+
+        UserStats.objects.bulk_create(
+            stats.values(),
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=list(COUNTER_FIELDS) + ['last_played_at', 'updated_at']
+        )
+        invalidate_match_stats(*chunk)
+        written += len(chunk)
+
+    return written
+
+
+class UserStatsLoader:
+    """Carregamento em lote das estatísticas dos usuários serializados em uma requisição.
+
+    Os serializers informam (prime) todos os usuários que vão exibir antes de
+    serializá-los; as linhas de UserStats ausentes são lidas em uma única
+    consulta e associadas às instâncias, de modo que total_matches, total_wins,
+    total_achievements e win_rate não consultam o banco. Um mesmo usuário em
+    vários pontos da resposta (criador, jogador, campeão) é carregado uma vez.
+    """
+
+    def __init__(self):
+        self.stats = {}
+
+    @classmethod
+    def for_context(cls, context: dict) -> 'UserStatsLoader':
+        """Loader da requisição do serializer (ou da árvore serializada, sem requisição)"""
+        request = context.get('request')
+        if request is None:
+            return context.setdefault('user_stats_loader', cls())
+        loader = getattr(request, 'user_stats_loader', None)
+        if loader is None:
+            loader = request.user_stats_loader = cls()
+        return loader
+
+    def prime(self, users: Iterable[User]) -> None:
+        users = [user for user in users if user is not None]
+        stats_field = User._meta.get_field('stats')
+
+        pending = set()
+        for user in users:
+            if user.pk in self.stats:
+                continue
+            cached = stats_field.get_cached_value(user, None) if stats_field.is_cached(user) else None
+            if cached is not None:
+                self.stats[user.pk] = cached
+            else:
+                pending.add(user.pk)
+
+        if pending:
+            loaded = {stats.user_id: stats for stats in UserStats.objects.filter(user_id__in=pending)}
+            missing = pending - loaded.keys()
+            if missing:
+                # Linhas ainda inexistentes: recalcula a partir das tabelas de origem
+                rebuild_user_stats(missing)
+                loaded.update(
+                    (stats.user_id, stats) for stats in UserStats.objects.filter(user_id__in=missing)
+                )
+            self.stats.update(loaded)
+
+        for user in users:
+            if user.pk in self.stats:
+                stats_field.set_cached_value(user, self.stats[user.pk])
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from typing import Iterable
+from django.db.models import F, Window
+from django.db.models.functions import Lag
+from django.utils import timezone
+from .models import User, UserStats
+
+# Intervalo máximo entre o início de duas partidas de uma mesma sessão
+SESSION_GAP = timedelta(hours=2)
+
+STREAK_FIELDS = (
+    'day_streak', 'best_day_streak',
+    'session_streak', 'best_session_streak',
+    'win_streak', 'best_win_streak',
+    'last_streak_match_started_at',
+)
+
+
+def advance_streaks(stats: UserStats, started_at, is_winner: bool, previous_started_at=None) -> None:
+    """Avança as sequências com uma partida finalizada, em ordem cronológica.
+
+    previous_started_at é o início da partida anterior do usuário (None na primeira).
+    """
+    if previous_started_at is None:
+        stats.day_streak = 1
+        stats.session_streak = 1
+    else:
+        day = timezone.localtime(started_at).date()
+        previous_day = timezone.localtime(previous_started_at).date()
+        if day == previous_day + timedelta(days=1):
+            stats.day_streak += 1
+        elif day != previous_day:
+            stats.day_streak = 1
+        
+        if started_at - previous_started_at <= SESSION_GAP:
+            stats.session_streak += 1
+        else:
+            stats.session_streak = 1
+    
+    stats.win_streak = stats.win_streak + 1 if is_winner else 0
+    stats.best_day_streak = max(stats.best_day_streak, stats.day_streak)
+    stats.best_session_streak = max(stats.best_session_streak, stats.session_streak)
+    stats.best_win_streak = max(stats.best_win_streak, stats.win_streak)
+    stats.last_streak_match_started_at = started_at
+
+
+def record_match_streaks(match) -> None:
+    """Atualiza incrementalmente as sequências dos jogadores de uma partida finalizada.
+
+    Deve ser chamado dentro da transação que finaliza a partida. Partidas que
+    começaram antes da última já contabilizada (fora de ordem) são ignoradas;
+    rebuild_user_streaks as incorpora.
+    """
+    winners = dict(match.match_players.values_list('user_id', 'is_winner'))
+    rows = UserStats.objects.select_for_update().filter(user_id__in=list(winners))
+    
+    for stats in rows:
+        previous = stats.last_streak_match_started_at
+        if previous is not None and match.started_at < previous:
+            continue
+        advance_streaks(stats, match.started_at, winners[stats.user_id], previous)
+        stats.save(update_fields=list(STREAK_FIELDS) + ['updated_at'])
+
+
+def rebuild_user_streaks(user_ids: Iterable = None, batch_size: int = 1000) -> int:
+    """Recalcula as sequências a partir do histórico de partidas finalizadas.
+
+    A partida anterior de cada participação vem de uma função de janela
+    (LAG particionado por usuário); as participações são percorridas em ordem,
+    em streaming. Sem user_ids, recalcula todos os usuários.
+    """
+    from matches.models import MatchPlayer
+    
+    users = User.objects.order_by('pk')
+    if user_ids is not None:
+        users = users.filter(pk__in=list(user_ids))
+    all_ids = list(users.values_list('pk', flat=True))
+    
+    written = 0
+    for start in range(0, len(all_ids), batch_size):
+        chunk = all_ids[start:start + batch_size]
+        stats = {
+            user_id: UserStats(user_id=user_id, **{field: 0 for field in STREAK_FIELDS[:-1]})
+            for user_id in chunk
+        }
+        
+        rows = MatchPlayer.objects.filter(
+            user_id__in=chunk,
+            match__status='finalizada'
+        ).annotate(
+            started_at=F('match__started_at'),
+            previous_started_at=Window(
+                Lag('match__started_at'),
+                partition_by=[F('user_id')],
+                order_by=[F('match__started_at').asc(), F('match_id').asc()]
+            )
+        ).order_by('user_id', 'match__started_at', 'match_id').values_list(
+            'user_id', 'started_at', 'is_winner', 'previous_started_at'
+        )
+        
+        for user_id, started_at, is_winner, previous_started_at in rows.iterator(chunk_size=2000):
+            advance_streaks(stats[user_id], started_at, is_winner, previous_started_at)
+        
+        UserStats.objects.bulk_create(
+            stats.values(),
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=list(STREAK_FIELDS)
+        )
+        written += len(chunk)
+    
+    return written
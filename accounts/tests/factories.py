@@ -0,0 +1,11 @@
+import factory
+from accounts.models import User
+
+
+class UserFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = User
+
+    username = factory.Sequence(lambda n: f'jogador{n}')
+    email = factory.LazyAttribute(lambda user: f'{user.username}@example.com')
+    display_name = factory.LazyAttribute(lambda user: user.username.title())
@@ -0,0 +1,36 @@
+import pytest
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from accounts.models import UserStats
+from matches.models import Match, MatchPlayer, Move
+from matches.tests.factories import MatchFactory, MatchPlayerFactory
+from .factories import UserFactory
+
+
+def selects(queries):
+    return [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+
+
+@pytest.mark.django_db
+def test_match_player_created_by_id_reads_no_match_row():
+    match = MatchFactory()
+    user = UserFactory()
+
+    with CaptureQueriesContext(connection) as captured:
+        MatchPlayer.objects.create(match_id=match.pk, user=user, team='A', position=0)
+
+    # O início da partida entra no UPDATE das estatísticas como subconsulta
+    assert selects(captured.captured_queries) == []
+    stats = UserStats.objects.get(user=user)
+    assert (stats.total_matches, stats.last_played_at) == (1, Match.objects.get(pk=match.pk).started_at)
+
+
+@pytest.mark.django_db
+def test_move_created_with_loaded_player_reads_no_player_row():
+    player = MatchPlayerFactory()
+
+    with CaptureQueriesContext(connection) as captured:
+        Move.objects.create(match=player.match, player=player, turn_number=1, move_type='normal', points=1)
+
+    assert selects(captured.captured_queries) == []
+    assert UserStats.objects.get(user=player.user).total_moves == 1
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class AchievementsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'achievements'
-    verbose_name = 'Achievements'
\ No newline at end of file
+    verbose_name = 'Achievements'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,68 @@
+import uuid
+from typing import Dict, Iterable, Set
+from django.core.cache import cache
+from .models import UserAchievement
+
+# Tempo de vida do conjunto de conquistas desbloqueadas no cache
+UNLOCKED_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def unlocked_cache_key(user_id) -> str:
+    return f'achievements:unlocked:{user_id}'
+
+
+def get_unlocked_ids(user_ids: Iterable) -> Dict[object, Set]:
+    """Retorna os ids das conquistas desbloqueadas de cada usuário.
+
+    Os conjuntos ficam no cache compartilhado; apenas os usuários ausentes
+    do cache são carregados do banco, em uma única consulta.
+    """
+    user_ids = list(user_ids)
+    keys = {unlocked_cache_key(user_id): user_id for user_id in user_ids}
+    cached = cache.get_many(keys)
+    unlocked = {keys[key]: set(value) for key, value in cached.items()}
+
+    missing = [user_id for user_id in user_ids if user_id not in unlocked]
+    if missing:
+        loaded = load_unlocked_ids(missing)
+        cache.set_many(
+            {unlocked_cache_key(user_id): ids for user_id, ids in loaded.items()},
+            UNLOCKED_CACHE_TIMEOUT
+        )
+        unlocked.update(loaded)
+
+    return unlocked
+
+
+def load_unlocked_ids(user_ids: Iterable) -> Dict[object, Set]:
+    """Ids das conquistas desbloqueadas de cada usuário, direto do banco (sem cache)"""
+    loaded = {user_id: set() for user_id in user_ids}
+    rows = UserAchievement.objects.filter(
+        user_id__in=list(loaded)
+    ).values_list('user_id', 'achievement_id')
+    for user_id, achievement_id in rows:
+        loaded[user_id].add(achievement_id)
+    return loaded
+
+
+def invalidate_unlocked(*user_ids) -> None:
+    """Descarta o conjunto em cache; o próximo acesso recarrega do banco"""
+    cache.delete_many([unlocked_cache_key(user_id) for user_id in user_ids])
+
+
+# Versão do catálogo de conquistas ativas, compartilhada entre os processos
+CATALOG_VERSION_KEY = 'achievements:catalog:version'
+
+
+def get_catalog_version() -> str:
+    """Versão atual do catálogo; inicializa a chave se ela não existir no cache"""
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version() -> None:
+    """Invalida o catálogo em todos os processos, que o recarregam no próximo acesso"""
+    cache.set(CATALOG_VERSION_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('achievements', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userachievement',
+            index=models.Index(fields=['user', '-unlocked_at'], name='user_ach_user_unlocked_idx'),
+        ),
+    ]
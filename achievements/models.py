@@ -40,9 +40,17 @@ class Achievement(models.Model):
     @property
     def total_unlocked(self):
         """Retorna quantos usuários desbloquearam esta conquista"""
+        # Usa a anotação da consulta quando disponível (ver with_total_unlocked)
+        if hasattr(self, 'total_unlocked_count'):
+            return self.total_unlocked_count
         return self.user_achievements.count()
 
 
+def with_total_unlocked(queryset):
+    """Anota o total de desbloqueios de cada conquista, evitando um count() por linha"""
+    return queryset.annotate(total_unlocked_count=models.Count('user_achievements'))
+
+
 class UserAchievement(models.Model):
     """Modelo para conquistas desbloqueadas por usuários"""
     
@@ -59,6 +67,10 @@ class UserAchievement(models.Model):
         verbose_name_plural = 'Conquistas dos Usuários'
         unique_together = ['user', 'achievement']
         ordering = ['-unlocked_at']
+        indexes = [
+            # Conquistas recentes do usuário (?since=, ordenadas por data)
+            models.Index(fields=['user', '-unlocked_at'], name='user_ach_user_unlocked_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.display_name} - {self.achievement.name}"
\ No newline at end of file
@@ -0,0 +1,30 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .cache import bump_catalog_version, invalidate_unlocked
+from .models import Achievement, UserAchievement
+
+
+@receiver(post_save, sender=UserAchievement)
+def user_achievement_saved(sender, instance, created, **kwargs):
+    """Mantém o cache de conquistas desbloqueadas atualizado.
+
+    A chave só é descartada após o commit: antes dele, um leitor concorrente
+    recarregaria o conjunto antigo, que ficaria no cache até expirar.
+    """
+    if created:
+        user_id = instance.user_id
+        transaction.on_commit(lambda: invalidate_unlocked(user_id))
+
+
+@receiver(post_delete, sender=UserAchievement)
+def user_achievement_deleted(sender, instance, **kwargs):
+    user_id = instance.user_id
+    transaction.on_commit(lambda: invalidate_unlocked(user_id))
+
+
+@receiver(post_save, sender=Achievement)
+@receiver(post_delete, sender=Achievement)
+def achievement_changed(sender, **kwargs):
+    """Qualquer alteração em uma conquista invalida o catálogo de todos os processos"""
+    transaction.on_commit(bump_catalog_version)
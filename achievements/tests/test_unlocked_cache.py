@@ -0,0 +1,21 @@
+import pytest
+from django.core.cache import cache
+from achievements.cache import get_unlocked_ids, unlocked_cache_key
+from achievements.models import Achievement, UserAchievement
+from accounts.tests.factories import UserFactory
+
+
+@pytest.mark.django_db
+def test_unlock_invalidates_cached_set_only_after_commit(django_capture_on_commit_callbacks):
+    user = UserFactory()
+    achievement = Achievement.objects.create(code='zagueiro', name='Zagueiro', description='-', category='diversao')
+    cache.delete(unlocked_cache_key(user.pk))
+    get_unlocked_ids([user.pk])
+
+    with django_capture_on_commit_callbacks(execute=True):
+        UserAchievement.objects.create(user=user, achievement=achievement)
+        # Antes do commit a chave continua lá: um leitor concorrente não a recarrega com o conjunto antigo
+        assert cache.get(unlocked_cache_key(user.pk)) == set()
+
+    assert cache.get(unlocked_cache_key(user.pk)) is None
+    assert get_unlocked_ids([user.pk]) == {user.pk: {achievement.id}}
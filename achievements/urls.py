@@ -9,5 +9,8 @@ urlpatterns = [
     path('my/<uuid:pk>/', views.UserAchievementDetailView.as_view(), name='user_achievement_detail'),
     path('stats/', views.achievement_stats, name='achievement_stats'),
     path('leaderboard/', views.leaderboard, name='leaderboard'),
+    path('unlocks/', views.recent_unlocks, name='recent_unlocks'),
+    path('profiling/', views.rule_profiling, name='rule_profiling'),
+    path('progress/', views.all_achievements_progress, name='all_achievements_progress'),
     path('<uuid:achievement_id>/progress/', views.achievement_progress, name='achievement_progress'),
 ]
\ No newline at end of file
@@ -1,19 +1,29 @@
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from datetime import timedelta
 from django.db.models import Count, Q
-from .models import Achievement, UserAchievement
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Achievement, UserAchievement, with_total_unlocked
 from .serializers import (
     AchievementSerializer,
     UserAchievementSerializer,
     UserAchievementListSerializer,
     AchievementStatsSerializer
 )
+from core.achievement_engine import achievement_engine
+from core.profiling import rule_profiler
+from core.progress import ProgressData
+
+# Margem do polling de desbloqueios: uma conquista gravada com unlocked_at anterior
+# ao último since, mas confirmada (commit) depois dele, ainda é entregue
+UNLOCKS_POLL_OVERLAP = timedelta(seconds=30)
 
 
 class AchievementListView(generics.ListAPIView):
     """Lista todas as conquistas disponíveis"""
-    queryset = Achievement.objects.filter(is_active=True)
+    queryset = with_total_unlocked(Achievement.objects.filter(is_active=True))
     serializer_class = AchievementSerializer
     permission_classes = [permissions.IsAuthenticated]
     filterset_fields = ['category']
@@ -47,32 +57,30 @@ def achievement_stats(request):
     """Estatísticas de conquistas do usuário"""
     user = request.user
     
-    # Total de conquistas disponíveis
-    total_achievements = Achievement.objects.filter(is_active=True).count()
+    # Conquistas disponíveis (catálogo em memória)
+    catalog = achievement_engine.catalog.snapshot()
+    total_achievements = len(catalog.entries)
     
-    # Conquistas desbloqueadas pelo usuário
+    # Conquistas desbloqueadas pelo usuário, agrupadas por categoria em uma consulta
     user_achievements = UserAchievement.objects.filter(user=user)
-    unlocked_achievements = user_achievements.count()
+    unlocked_by_category = dict(
+        user_achievements.order_by().values_list('achievement__category').annotate(total=Count('id'))
+    )
+    unlocked_achievements = sum(unlocked_by_category.values())
     
     # Porcentagem de conclusão
     completion_percentage = (unlocked_achievements / total_achievements * 100) if total_achievements > 0 else 0
     
     # Conquistas recentes (últimas 5)
-    recent_achievements = user_achievements.order_by('-unlocked_at')[:5]
+    recent_achievements = user_achievements.select_related('achievement').order_by('-unlocked_at')[:5]
     
     # Conquistas por categoria
     achievements_by_category = {}
     categories = Achievement.CATEGORY_CHOICES
     
     for category_code, category_name in categories:
-        total_in_category = Achievement.objects.filter(
-            category=category_code, 
-            is_active=True
-        ).count()
-        
-        unlocked_in_category = user_achievements.filter(
-            achievement__category=category_code
-        ).count()
+        total_in_category = len(catalog.by_category.get(category_code, ()))
+        unlocked_in_category = unlocked_by_category.get(category_code, 0)
         
         achievements_by_category[category_name] = {
             'total': total_in_category,
@@ -101,15 +109,19 @@ def leaderboard(request):
     User = get_user_model()
     
     # Usuários com mais conquistas
-    users_with_achievements = User.objects.annotate(
+    users_with_achievements = list(User.objects.annotate(
         achievement_count=Count('user_achievements')
     ).filter(
         achievement_count__gt=0
-    ).order_by('-achievement_count')[:10]
+    ).order_by('-achievement_count')[:10])
+    
+    # Estatísticas de todos os usuários do ranking em uma única consulta
+    profiles = UserProfileSerializer(
+        users_with_achievements, many=True, context={'request': request}
+    ).data
     
     leaderboard_data = []
-    for i, user in enumerate(users_with_achievements, 1):
-        user_data = UserProfileSerializer(user).data
+    for i, (user, user_data) in enumerate(zip(users_with_achievements, profiles), 1):
         user_data['position'] = i
         user_data['achievement_count'] = user.achievement_count
         leaderboard_data.append(user_data)
@@ -119,12 +131,36 @@ def leaderboard(request):
     })
 
 
+def _progress_entry(achievement, user, data):
+    """Progresso do usuário em uma conquista, a partir dos dados agregados"""
+    unlocked_at = data.unlocked.get(achievement.id)
+    
+    if unlocked_at:
+        return {
+            'achievement': AchievementSerializer(achievement).data,
+            'unlocked': True,
+            'unlocked_at': unlocked_at,
+            'progress': 100
+        }
+    
+    current, target = achievement_engine.rule_progress(achievement.code, user, data)
+    progress = min((current / target) * 100, 100) if target else 0
+    
+    return {
+        'achievement': AchievementSerializer(achievement).data,
+        'unlocked': False,
+        'current': current,
+        'target': target,
+        'progress': round(progress, 2)
+    }
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def achievement_progress(request, achievement_id):
     """Progresso do usuário em uma conquista específica"""
     try:
-        achievement = Achievement.objects.get(id=achievement_id, is_active=True)
+        achievement = with_total_unlocked(Achievement.objects.filter(is_active=True)).get(id=achievement_id)
     except Achievement.DoesNotExist:
         return Response(
             {'error': 'Conquista não encontrada'}, 
@@ -132,32 +168,77 @@ def achievement_progress(request, achievement_id):
         )
     
     user = request.user
+    rule = achievement_engine.achievement_rules.get(achievement.code)
+    data = ProgressData(user, rules=[rule] if rule else [])
     
-    # Verifica se o usuário já possui a conquista
-    user_achievement = UserAchievement.objects.filter(
-        user=user, 
-        achievement=achievement
-    ).first()
-    
-    if user_achievement:
-        return Response({
-            'achievement': AchievementSerializer(achievement).data,
-            'unlocked': True,
-            'unlocked_at': user_achievement.unlocked_at,
-            'progress': 100
-        })
+    return Response(_progress_entry(achievement, user, data))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def all_achievements_progress(request):
+    """Progresso do usuário em todas as conquistas ativas (consultas agregadas em lote)"""
+    user = request.user
+    achievements = with_total_unlocked(Achievement.objects.filter(is_active=True))
+    data = ProgressData(user, rules=achievement_engine.achievement_rules.values())
     
-    # Para conquistas não desbloqueadas, retorna progresso básico
-    # Aqui você pode implementar lógica específica para cada tipo de conquista
-    progress = 0
+    return Response({
+        'results': [_progress_entry(achievement, user, data) for achievement in achievements]
+    })
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def recent_unlocks(request):
+    """Conquistas desbloqueadas pelo usuário desde um instante (polling).
+
+    A janela consultada começa UNLOCKS_POLL_OVERLAP antes de since, então
+    conquistas já entregues podem se repetir: o cliente ignora ids já vistos.
+    """
+    since_param = request.query_params.get('since')
+    unlocks = UserAchievement.objects.filter(
+        user=request.user
+    ).select_related('achievement')
+    
+    if since_param:
+        since = parse_datetime(since_param)
+        if since is None:
+            return Response(
+                {'error': 'Parâmetro since inválido (use ISO 8601)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        unlocks = unlocks.filter(
+            unlocked_at__gt=since - UNLOCKS_POLL_OVERLAP
+        ).order_by('unlocked_at')[:100]
+    else:
+        # Sem since, retorna as conquistas mais recentes
+        unlocks = list(unlocks.order_by('-unlocked_at')[:20])[::-1]
+    
+    unlocks = list(unlocks)
+    
+    # O cliente deve enviar next_since no próximo polling
+    if unlocks:
+        next_since = unlocks[-1].unlocked_at.isoformat()
+    else:
+        next_since = since_param or timezone.now().isoformat()
     
-    # Exemplo: para conquista de número de partidas
-    if achievement.code == 'ceo_sinuca':
-        total_matches = user.total_matches
-        progress = min((total_matches / 50) * 100, 100)
+    return Response({
+        'results': UserAchievementListSerializer(unlocks, many=True).data,
+        'next_since': next_since
+    })
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([permissions.IsAdminUser])
+def rule_profiling(request):
+    """Histogramas de custo das regras de conquistas neste processo (apenas staff)"""
+    if request.method == 'DELETE':
+        rule_profiler.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
     
     return Response({
-        'achievement': AchievementSerializer(achievement).data,
-        'unlocked': False,
-        'progress': round(progress, 2)
-    })
\ No newline at end of file
+        'enabled': rule_profiler.enabled,
+        **rule_profiler.snapshot()
+    })
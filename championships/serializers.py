@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
 from .models import Championship, ChampionshipMatch, ChampionshipParticipant
 from matches.models import Match
-from accounts.serializers import UserProfileSerializer
+from accounts.serializers import UserProfileSerializer, UserStatsBatchMixin, UserStatsListSerializer
 
 User = get_user_model()
 
@@ -32,10 +33,10 @@ class ChampionshipMatchSerializer(serializers.ModelSerializer):
     
     def get_match_details(self, obj):
         from matches.serializers import MatchListSerializer
-        return MatchListSerializer(obj.match).data
+        return MatchListSerializer(obj.match, context=self.context).data
 
 
-class ChampionshipSerializer(serializers.ModelSerializer):
+class ChampionshipSerializer(UserStatsBatchMixin, serializers.ModelSerializer):
     """Serializer completo para campeonatos"""
     created_by = UserProfileSerializer(read_only=True)
     participants = ChampionshipParticipantSerializer(many=True, read_only=True)
@@ -52,10 +53,28 @@ class ChampionshipSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_by', 'created_at']
     
+    @staticmethod
+    def setup_queryset(queryset):
+        """Criador, participantes e partidas (com criador e vencedor) em um número fixo de consultas"""
+        from matches.serializers import MatchListSerializer
+        return queryset.select_related('created_by').prefetch_related(
+            Prefetch('participants', queryset=ChampionshipParticipant.objects.select_related('user')),
+            Prefetch(
+                'championship_matches',
+                queryset=ChampionshipMatch.objects.prefetch_related(
+                    Prefetch('match', queryset=MatchListSerializer.setup_queryset(Match.objects.all()))
+                )
+            ),
+        )
+    
+    def serialized_users(self, instance):
+        # O campeão e os jogadores das partidas são participantes: reutilizam a mesma carga
+        return [instance.created_by] + [participant.user for participant in instance.participants.all()]
+    
     def get_champion(self, obj):
         champion = obj.champion
         if champion:
-            return UserProfileSerializer(champion).data
+            return UserProfileSerializer(champion, context=self.context).data
         return None
     
     def create(self, validated_data):
@@ -63,7 +82,7 @@ class ChampionshipSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ChampionshipListSerializer(serializers.ModelSerializer):
+class ChampionshipListSerializer(UserStatsBatchMixin, serializers.ModelSerializer):
     """Serializer simplificado para listar campeonatos"""
     created_by = UserProfileSerializer(read_only=True)
     participant_count = serializers.SerializerMethodField()
@@ -77,6 +96,10 @@ class ChampionshipListSerializer(serializers.ModelSerializer):
             'started_at', 'ended_at', 'is_finished', 'max_participants',
             'participant_count', 'total_matches', 'champion'
         ]
+        list_serializer_class = UserStatsListSerializer
+    
+    def serialized_users(self, instance):
+        return [instance.created_by]
     
     def get_participant_count(self, obj):
         return obj.participants.count()
@@ -15,6 +15,7 @@ from .serializers import (
 )
 from matches.models import Match, MatchPlayer
 from matches.serializers import MatchSerializer
+from core.tasks import schedule_championship_evaluation
 
 User = get_user_model()
 
@@ -33,14 +34,14 @@ class ChampionshipListCreateView(generics.ListCreateAPIView):
     
     def get_queryset(self):
         # Retorna todos os campeonatos públicos
-        return Championship.objects.all()
+        return Championship.objects.select_related('created_by')
 
 
 class ChampionshipDetailView(generics.RetrieveUpdateAPIView):
     """Detalhes e atualização de campeonato"""
     serializer_class = ChampionshipSerializer
     permission_classes = [permissions.IsAuthenticated]
-    queryset = Championship.objects.all()
+    queryset = ChampionshipSerializer.setup_queryset(Championship.objects.all())
     
     def get_object(self):
         obj = super().get_object()
@@ -52,6 +53,14 @@ class ChampionshipDetailView(generics.RetrieveUpdateAPIView):
         return obj
 
 
+def _serialize_championship(championship, request):
+    """Recarrega o campeonato com setup_queryset e o serializa por completo"""
+    championship = ChampionshipSerializer.setup_queryset(
+        Championship.objects.filter(pk=championship.pk)
+    ).get()
+    return ChampionshipSerializer(championship, context={'request': request}).data
+
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def join_championship(request):
@@ -73,7 +82,7 @@ def join_championship(request):
         
         return Response({
             'message': 'Você se inscreveu no campeonato com sucesso!',
-            'championship': ChampionshipListSerializer(championship).data
+            'championship': ChampionshipListSerializer(championship, context={'request': request}).data
         }, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -151,7 +160,7 @@ def start_championship(request, championship_id):
     
     return Response({
         'message': 'Campeonato iniciado com sucesso!',
-        'championship': ChampionshipSerializer(championship).data
+        'championship': _serialize_championship(championship, request)
     })
 
 
@@ -185,10 +194,13 @@ def finish_championship(request, championship_id):
     championship.ended_at = timezone.now()
     championship.save()
     
+    # Avalia conquistas de fim de campeonato em segundo plano
+    schedule_championship_evaluation(championship)
+    
     return Response({
         'message': 'Campeonato finalizado com sucesso!',
-        'championship': ChampionshipSerializer(championship).data,
-        'champion': ChampionshipListSerializer(championship).data.get('champion')
+        'championship': _serialize_championship(championship, request),
+        'champion': ChampionshipListSerializer(championship, context={'request': request}).data.get('champion')
     })
 
 
@@ -233,7 +245,7 @@ def create_championship_match(request):
         
         return Response({
             'message': 'Partida de campeonato criada com sucesso!',
-            'match': MatchSerializer(match).data,
+            'match': MatchSerializer(match, context={'request': request}).data,
             'championship_match_id': championship_match.id
         }, status=status.HTTP_201_CREATED)
     
@@ -308,7 +320,9 @@ def championship_stats(request):
         'total_championship_matches': total_championship_matches,
         'championship_matches_won': championship_matches_won,
         'favorite_championship_size': favorite_championship_size,
-        'recent_championships': ChampionshipListSerializer(recent_championships, many=True).data
+        'recent_championships': ChampionshipListSerializer(
+            recent_championships.select_related('created_by'), many=True, context={'request': request}
+        ).data
     }
     
     return Response(data)
@@ -324,7 +338,7 @@ class MyChampionshipsView(generics.ListAPIView):
         user = self.request.user
         return Championship.objects.filter(
             Q(created_by=user) | Q(participants__user=user)
-        ).distinct()
+        ).distinct().select_related('created_by')
 
 
 @api_view(['GET'])
@@ -0,0 +1,16 @@
+"""
+Celery application for config project.
+
+Tasks are discovered from the ``tasks.py`` module of each installed app.
+The worker is started with ``celery -A config worker`` (see Procfile).
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+app = Celery('config')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
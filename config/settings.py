@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 from decouple import config
 from datetime import timedelta
+from corsheaders.defaults import default_headers
 import os
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -204,6 +205,33 @@ if RAILWAY_FRONTEND_URL:
     CORS_ALLOWED_ORIGINS.append(RAILWAY_FRONTEND_URL)
 
 CORS_ALLOW_CREDENTIALS = True
+# Retentativas seguras de escrita (ver core.idempotency)
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
+
+# Cache
+# Redis compartilhado entre os workers em produção (Railway); memória local em desenvolvimento e testes
+if os.environ.get('RAILWAY_ENVIRONMENT'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Profiling das regras de conquistas (histogramas em memória por processo)
+ACHIEVEMENT_PROFILING = config('ACHIEVEMENT_PROFILING', default=False, cast=bool)
+# Registra no log avaliações mais lentas que o limite, em ms (0 desativa)
+ACHIEVEMENT_SLOW_EVALUATION_MS = config('ACHIEVEMENT_SLOW_EVALUATION_MS', default=0, cast=int)
+
+# Tempo (s) durante o qual uma Idempotency-Key repetida recebe a resposta armazenada
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=60 * 60 * 24, cast=int)
 
 # Celery Configuration
 CELERY_BROKER_URL = config('REDIS_URL', default='redis://localhost:6379/0')
@@ -212,3 +240,12 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Fora do Railway as tarefas rodam no próprio processo (sem broker), o que também cobre os testes
+CELERY_TASK_ALWAYS_EAGER = config(
+    'CELERY_TASK_ALWAYS_EAGER',
+    default=not os.environ.get('RAILWAY_ENVIRONMENT'),
+    cast=bool
+)
+if CELERY_TASK_ALWAYS_EAGER:
+    CELERY_BROKER_URL = 'memory://'
+    CELERY_RESULT_BACKEND = 'cache+memory://'
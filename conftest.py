@@ -0,0 +1,22 @@
+import tempfile
+from pathlib import Path
+import pytest
+
+
+@pytest.fixture(scope='session')
+def django_db_modify_db_settings(django_db_modify_db_settings_parallel_suffix):
+    """No SQLite, usa um banco de teste em arquivo com transações IMMEDIATE.
+
+    O banco em memória não é compartilhado de forma segura entre threads, e no
+    modo DEFERRED dois escritores que começaram lendo falham com "database is
+    locked" em vez de esperar a vez; assim os testes de concorrência exercitam
+    a mesma serialização de escritas que o PostgreSQL faz com o lock da linha.
+    """
+    from django.conf import settings
+
+    database = settings.DATABASES['default']
+    if database['ENGINE'] == 'django.db.backends.sqlite3':
+        test_settings = database.setdefault('TEST', {})
+        if not test_settings.get('NAME'):
+            test_settings['NAME'] = str(Path(tempfile.gettempdir()) / 'sinucalabs_test.sqlite3')
+        database['OPTIONS'] = {**database.get('OPTIONS', {}), 'transaction_mode': 'IMMEDIATE', 'timeout': 30}
@@ -1,13 +1,36 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from django.contrib.auth import get_user_model
 from achievements.models import Achievement, UserAchievement
-from matches.models import Match, MatchPlayer, Move
-from django.db.models import Count, Q
-from datetime import datetime, timedelta
-from django.utils import timezone
+from matches.models import Match, Move
+from .catalog import AchievementCatalog
+from .match_context import MatchContext
+from .profiling import rule_profiler
+from .rule_compiler import CareerThresholdRule, DeclarativeRule, MoveCountRule, MoveExistsRule
 
 User = get_user_model()
 
+# Eventos que disparam a avaliação de conquistas
+MATCH_FINISHED = 'match_finished'
+CHAMPIONSHIP_FINISHED = 'championship_finished'
+
+# Faltas e erros também tiram pontos, mas não são ponto contra
+OWN_POINT_MOVE_TYPES = tuple(
+    move_type for move_type, _ in Move.MOVE_TYPE_CHOICES if move_type not in ('falta', 'erro')
+)
+
+
+def move_event(move_type: str) -> str:
+    """Evento disparado por uma jogada de um tipo específico"""
+    return f'move:{move_type}'
+
+
+def triggered_by(*events: str):
+    """Declara os eventos que disparam a regra de uma conquista"""
+    def decorator(func):
+        func.events = frozenset(events)
+        return func
+    return decorator
+
 
 class AchievementEngine:
     """Engine responsável por avaliar e desbloquear conquistas"""
@@ -45,325 +68,388 @@ class AchievementEngine:
             'meme_bola8': self._check_meme_bola8,
             'espirito_olimpico': self._check_espirito_olimpico,
         }
+        
+        # Índice evento -> códigos das regras interessadas nele
+        self.rules_by_event: Dict[str, set] = {}
+        for code, rule_func in self.achievement_rules.items():
+            for event in getattr(rule_func, 'events', ()):
+                self.rules_by_event.setdefault(event, set()).add(code)
+        
+        # Conquistas ativas em memória, com as regras associadas
+        self.catalog = AchievementCatalog(self.achievement_rules)
     
-    def evaluate_match_achievements(self, match: Match) -> List[Dict[str, Any]]:
-        """Avalia conquistas após o fim de uma partida"""
+    def rule_codes_for(self, event: str = None) -> set:
+        """Códigos das regras disparadas por um evento (todas, se nenhum evento for informado)"""
+        if event is None:
+            return set(self.achievement_rules)
+        return self.rules_by_event.get(event, set())
+    
+    def users_satisfying(self, code: str, user_ids=None, match_ids=None):
+        """Usuários que satisfazem uma regra declarativa, com uma única consulta.
+
+        Retorna None se a regra da conquista não for declarativa.
+        """
+        rule = self.achievement_rules.get(code)
+        if not isinstance(rule, DeclarativeRule):
+            return None
+        return rule.users_satisfying(user_ids, match_ids)
+    
+    def rule_progress(self, code: str, user: User, data) -> Tuple[int, int]:
+        """Progresso (atual, alvo) do usuário em uma regra, a partir de um ProgressData.
+
+        Regras sem medida intermediária são binárias: (0, 1).
+        """
+        rule = self.achievement_rules.get(code)
+        if isinstance(rule, DeclarativeRule):
+            return rule.progress(user, data)
+        progress_func = getattr(self, f'_progress_{code}', None)
+        if progress_func:
+            return progress_func(user, data)
+        return 0, 1
+    
+    def _active_achievements(self, codes: set) -> List[Achievement]:
+        return self.catalog.active(codes)
+    
+    def evaluate_match_achievements(self, match: Match, event: str = MATCH_FINISHED,
+                                    unlocked: Dict = None) -> List[Dict[str, Any]]:
+        """Avalia conquistas após o fim de uma partida.
+
+        unlocked substitui o cache compartilhado de conquistas desbloqueadas
+        (ex.: avaliações em transações que serão desfeitas).
+        """
+        codes = self.rule_codes_for(event)
+        if not codes:
+            return []
+        
+        context = MatchContext(match, unlocked=unlocked)
+        achievements = self._active_achievements(codes)
         unlocked_achievements = []
         
-        for player in match.match_players.all():
-            user_achievements = self.evaluate_user_achievements(player.user, match)
+        for player in context.players:
+            user_achievements = self._evaluate(player.user, context, achievements)
             unlocked_achievements.extend(user_achievements)
         
         return unlocked_achievements
     
-    def evaluate_user_achievements(self, user: User, match: Match = None) -> List[Dict[str, Any]]:
+    def evaluate_user_achievements(self, user: User, match: Match = None, event: str = None) -> List[Dict[str, Any]]:
         """Avalia conquistas para um usuário específico"""
+        codes = self.rule_codes_for(event)
+        if not codes:
+            return []
+        
+        context = MatchContext(match, users=[user])
+        achievements = self._active_achievements(codes)
+        return self._evaluate(user, context, achievements)
+    
+    def evaluate_moves_achievements(self, match: Match, user_ids, events) -> List[Dict[str, Any]]:
+        """Avalia, uma única vez, as conquistas disparadas por um lote de jogadas"""
+        codes = set().union(*(self.rule_codes_for(event) for event in events))
+        if not codes:
+            return []
+        
+        context = MatchContext(match)
+        achievements = self._active_achievements(codes)
+        user_ids = {str(user_id) for user_id in user_ids}
         unlocked_achievements = []
         
-        # Busca todas as conquistas ativas
-        achievements = Achievement.objects.filter(is_active=True)
+        for player in context.players:
+            if str(player.user_id) in user_ids:
+                unlocked_achievements.extend(self._evaluate(player.user, context, achievements))
         
-        for achievement in achievements:
-            # Verifica se o usuário já possui esta conquista
-            if UserAchievement.objects.filter(user=user, achievement=achievement).exists():
-                continue
-            
-            # Verifica se a regra da conquista foi atendida
-            rule_func = self.achievement_rules.get(achievement.code)
-            if rule_func and rule_func(user, match):
-                # Desbloqueia a conquista
-                user_achievement = UserAchievement.objects.create(
-                    user=user,
-                    achievement=achievement,
-                    match=match
-                )
+        return unlocked_achievements
+    
+    def evaluate_championship_achievements(self, championship) -> List[Dict[str, Any]]:
+        """Avalia conquistas após o fim de um campeonato"""
+        codes = self.rule_codes_for(CHAMPIONSHIP_FINISHED)
+        if not codes:
+            return []
+        
+        users = [
+            participant.user
+            for participant in championship.participants.select_related('user')
+        ]
+        context = MatchContext(users=users, championship=championship)
+        achievements = self._active_achievements(codes)
+        unlocked_achievements = []
+        
+        for user in users:
+            unlocked_achievements.extend(self._evaluate(user, context, achievements))
+        
+        return unlocked_achievements
+    
+    def _evaluate(self, user: User, context: MatchContext, achievements: List[Achievement]) -> List[Dict[str, Any]]:
+        """Executa as regras das conquistas ativas contra o contexto em memória"""
+        unlocked_achievements = []
+        label = f'user={user.pk} match={context.match.pk if context.match else None}'
+        
+        with rule_profiler.evaluation(label) as profile:
+            for achievement in achievements:
+                # Verifica se o usuário já possui esta conquista
+                if achievement.id in context.unlocked(user):
+                    continue
                 
-                unlocked_achievements.append({
-                    'user': user,
-                    'achievement': achievement,
-                    'user_achievement': user_achievement,
-                    'match': match
-                })
+                # Verifica se a regra da conquista foi atendida
+                rule_func = self.achievement_rules.get(achievement.code)
+                if rule_func and profile.run(achievement.code, rule_func, user, context):
+                    # Desbloqueia a conquista (o cache pode estar defasado em relação a outro worker)
+                    user_achievement, created = UserAchievement.objects.get_or_create(
+                        user=user,
+                        achievement=achievement,
+                        defaults={'match': context.match}
+                    )
+                    context.mark_unlocked(user, achievement.id)
+                    if not created:
+                        continue
+                    
+                    unlocked_achievements.append({
+                        'user': user,
+                        'achievement': achievement,
+                        'user_achievement': user_achievement,
+                        'match': context.match
+                    })
         
         return unlocked_achievements
     
     # Regras específicas para cada conquista
     
-    def _check_indesnucavel(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_indesnucavel(self, user: User, context: MatchContext) -> bool:
         """Escapou de 3 snookers na mesma partida"""
-        if not match:
-            return False
-        
-        player = match.match_players.filter(user=user).first()
+        player = context.player(user)
         if not player:
             return False
         
         # Conta snookers sofridos (quando o oponente fez snooker)
-        snooker_escapes = Move.objects.filter(
-            match=match,
-            move_type='snooker'
-        ).exclude(player=player).count()
-        
-        return snooker_escapes >= 3
+        return context.count_opponent_moves(player, 'snooker') >= 3
     
-    def _check_rei_desnuque(self, user: User, match: Match) -> bool:
-        """Deu 5 snookers na mesma partida"""
-        if not match:
-            return False
-        
-        player = match.match_players.filter(user=user).first()
-        if not player:
-            return False
-        
-        snookers_made = Move.objects.filter(
-            match=match,
-            player=player,
-            move_type='snooker'
-        ).count()
-        
-        return snookers_made >= 5
+    # Deu 5 snookers na mesma partida
+    _check_rei_desnuque = triggered_by(MATCH_FINISHED, move_event('snooker'))(
+        MoveCountRule('snooker', at_least=5)
+    )
     
-    def _check_gato_doido(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_gato_doido(self, user: User, context: MatchContext) -> bool:
         """Jogou tudo errado, mas venceu"""
-        if not match:
-            return False
-        
-        player = match.match_players.filter(user=user, is_winner=True).first()
+        player = context.player(user, is_winner=True)
         if not player:
             return False
         
         # Verifica se teve muitos erros mas ainda ganhou
-        errors = Move.objects.filter(
-            match=match,
-            player=player,
-            move_type='erro'
-        ).count()
-        
-        total_moves = Move.objects.filter(match=match, player=player).count()
+        errors = context.count_moves(player, 'erro')
+        total_moves = context.count_moves(player)
         
         return errors >= 3 and total_moves > 5
     
-    def _check_roleta_sorte(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_roleta_sorte(self, user: User, context: MatchContext) -> bool:
         """Venceu jogando na sorte"""
-        if not match:
-            return False
-        
-        player = match.match_players.filter(user=user, is_winner=True).first()
+        player = context.player(user, is_winner=True)
         if not player:
             return False
         
-        lucky_moves = Move.objects.filter(
-            match=match,
-            player=player,
-            move_type='na_sorte'
-        ).count()
-        
-        return lucky_moves >= 3
+        return context.count_moves(player, 'na_sorte') >= 3
     
-    def _check_relampago(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_relampago(self, user: User, context: MatchContext) -> bool:
         """Ganhou em menos de 3 minutos"""
+        match = context.match
         if not match or not match.duration_minutes:
             return False
         
-        player = match.match_players.filter(user=user, is_winner=True).first()
+        player = context.player(user, is_winner=True)
         if not player:
             return False
         
         return match.duration_minutes < 3
     
-    def _check_ceo_sinuca(self, user: User, match: Match) -> bool:
-        """Jogou 50 partidas"""
-        total_matches = MatchPlayer.objects.filter(user=user).count()
-        return total_matches >= 50
+    # Jogou 50 partidas
+    _check_ceo_sinuca = triggered_by(MATCH_FINISHED)(
+        CareerThresholdRule('total_matches', at_least=50)
+    )
     
-    def _check_taco_destino(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_taco_destino(self, user: User, context: MatchContext) -> bool:
         """Ganhou na última bola, na última jogada"""
-        if not match:
-            return False
-        
-        player = match.match_players.filter(user=user, is_winner=True).first()
+        player = context.player(user, is_winner=True)
         if not player:
             return False
         
         # Verifica se a última jogada foi a vencedora
-        last_move = Move.objects.filter(match=match, player=player).order_by('-turn_number').first()
-        return last_move and last_move.is_winning_move
+        moves = context.moves_of(player)
+        return bool(moves) and moves[-1].is_winning_move
     
-    def _check_mestre_tatica(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_mestre_tatica(self, user: User, context: MatchContext) -> bool:
         """Eliminou só a última bola do adversário"""
-        if not match:
-            return False
-        
-        player = match.match_players.filter(user=user, is_winner=True).first()
+        player = context.player(user, is_winner=True)
         if not player:
             return False
         
         # Lógica específica para verificar se eliminou apenas a última bola
         # Por simplicidade, verificamos se fez poucas jogadas mas ganhou
-        player_moves = Move.objects.filter(match=match, player=player).count()
-        return player_moves <= 3 and player.is_winner
+        return context.count_moves(player) <= 3 and player.is_winner
     
-    def _check_nunca_erraram(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_nunca_erraram(self, user: User, context: MatchContext) -> bool:
         """Fez uma partida perfeita (sem erros)"""
-        if not match:
-            return False
-        
-        player = match.match_players.filter(user=user).first()
+        player = context.player(user)
         if not player:
             return False
         
-        errors = Move.objects.filter(
-            match=match,
-            player=player,
-            move_type__in=['erro', 'falta']
-        ).count()
-        
-        total_moves = Move.objects.filter(match=match, player=player).count()
+        errors = context.count_moves(player, 'erro', 'falta')
+        total_moves = context.count_moves(player)
         
         return errors == 0 and total_moves >= 5
     
-    def _check_acabou_comigo(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_acabou_comigo(self, user: User, context: MatchContext) -> bool:
         """Foi derrotado sem fazer um único ponto"""
-        if not match:
-            return False
-        
-        player = match.match_players.filter(user=user, is_winner=False).first()
+        player = context.player(user, is_winner=False)
         if not player:
             return False
         
         return player.points == 0
     
-    def _check_zerado(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_zerado(self, user: User, context: MatchContext) -> bool:
         """Terminou a partida com 0 pontos"""
-        if not match:
-            return False
-        
-        player = match.match_players.filter(user=user).first()
+        player = context.player(user)
         if not player:
             return False
         
         return player.points == 0
     
-    def _check_combo_5x(self, user: User, match: Match) -> bool:
-        """Acertou 5 bolas consecutivas"""
-        if not match:
-            return False
-        
-        player = match.match_players.filter(user=user).first()
+    # Acertou 5 bolas consecutivas
+    _check_combo_5x = triggered_by(MATCH_FINISHED, move_event('combo'))(
+        MoveExistsRule(consecutive_count__gte=5)
+    )
+    
+    # Implementações simplificadas para as demais conquistas
+    @triggered_by(MATCH_FINISHED)
+    def _check_sniper(self, user: User, context: MatchContext) -> bool:
+        # 5 jogadas pontuadas seguidas, sem ceder a vez
+        player = context.player(user)
         if not player:
             return False
-        
-        # Verifica se existe alguma jogada com consecutive_count >= 5
-        combo_move = Move.objects.filter(
-            match=match,
-            player=player,
-            consecutive_count__gte=5
-        ).exists()
-        
-        return combo_move
+        return context.replay.best_run.get(player.pk, 0) >= 5
     
-    # Implementações simplificadas para as demais conquistas
-    def _check_sniper(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_marretao(self, user: User, context: MatchContext) -> bool:
         return False  # Implementar lógica específica
     
-    def _check_marretao(self, user: User, match: Match) -> bool:
-        return False  # Implementar lógica específica
+    # Fez 2 tabelas na mesma partida
+    _check_tabelinha = triggered_by(MATCH_FINISHED, move_event('tabela'))(
+        MoveCountRule('tabela', at_least=2)
+    )
     
-    def _check_tabelinha(self, user: User, match: Match) -> bool:
-        if not match:
-            return False
-        player = match.match_players.filter(user=user).first()
+    @triggered_by(MATCH_FINISHED)
+    def _check_vira_vira(self, user: User, context: MatchContext) -> bool:
+        # Venceu a partida depois de estar atrás no placar
+        player = context.player(user, is_winner=True)
         if not player:
             return False
-        return Move.objects.filter(match=match, player=player, move_type='tabela').count() >= 2
+        return context.replay.max_deficit.get(player.team, 0) > 0
     
-    def _check_vira_vira(self, user: User, match: Match) -> bool:
-        return False  # Implementar lógica de virada
-    
-    def _check_campeao(self, user: User, match: Match) -> bool:
+    @triggered_by(CHAMPIONSHIP_FINISHED)
+    def _check_campeao(self, user: User, context: MatchContext) -> bool:
+        """Venceu um campeonato"""
+        if context.championship is not None:
+            return context.champion == user
+        
+        # Fora do evento de campeonato, verifica os campeonatos finalizados do usuário
         from championships.models import Championship
-        return Championship.objects.filter(champion=user).exists()
+        championships = Championship.objects.filter(participants__user=user, is_finished=True)
+        return any(championship.champion == user for championship in championships)
     
-    def _check_viciado(self, user: User, match: Match) -> bool:
-        # Verifica se jogou todos os dias da semana
-        week_ago = timezone.now() - timedelta(days=7)
-        matches_this_week = MatchPlayer.objects.filter(
-            user=user,
-            match__started_at__gte=week_ago
-        ).values('match__started_at__date').distinct().count()
-        return matches_this_week >= 7
+    # Jogou todos os dias da semana (7 dias consecutivos)
+    _check_viciado = triggered_by(MATCH_FINISHED)(
+        CareerThresholdRule('best_day_streak', 7)
+    )
     
-    def _check_colecionador(self, user: User, match: Match) -> bool:
-        return UserAchievement.objects.filter(user=user).count() >= 10
+    @triggered_by(MATCH_FINISHED, CHAMPIONSHIP_FINISHED)
+    def _check_colecionador(self, user: User, context: MatchContext) -> bool:
+        return len(context.unlocked(user)) >= 10
     
-    def _check_fantasma(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_fantasma(self, user: User, context: MatchContext) -> bool:
         return False  # Implementar lógica específica
     
-    def _check_zagueiro(self, user: User, match: Match) -> bool:
-        return False  # Implementar lógica de ponto contra
+    # Fez um ponto contra (jogada com pontuação negativa que não é falta nem erro)
+    _check_zagueiro = triggered_by(MATCH_FINISHED)(
+        MoveExistsRule(points__lt=0, move_type__in=OWN_POINT_MOVE_TYPES)
+    )
     
-    def _check_palhaco(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_palhaco(self, user: User, context: MatchContext) -> bool:
         return False  # Implementar lógica específica
     
-    def _check_sem_choro(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_sem_choro(self, user: User, context: MatchContext) -> bool:
         return False  # Implementar lógica específica
     
-    def _check_sanguenozoi(self, user: User, match: Match) -> bool:
-        # Jogou 5 partidas seguidas
-        recent_matches = MatchPlayer.objects.filter(
-            user=user
-        ).order_by('-match__started_at')[:5]
-        
-        if recent_matches.count() < 5:
-            return False
-        
-        # Verifica se foram em sequência (sem muito tempo entre elas)
-        for i in range(len(recent_matches) - 1):
-            time_diff = recent_matches[i].match.started_at - recent_matches[i+1].match.started_at
-            if time_diff > timedelta(hours=2):
-                return False
-        
-        return True
+    # Jogou 5 partidas seguidas (até 2h entre elas)
+    _check_sanguenozoi = triggered_by(MATCH_FINISHED)(
+        CareerThresholdRule('best_session_streak', 5)
+    )
     
-    def _check_testa_fria(self, user: User, match: Match) -> bool:
-        if not match:
-            return False
-        player = match.match_players.filter(user=user).first()
-        if not player:
-            return False
-        return Move.objects.filter(
-            match=match, 
-            player=player, 
-            time_taken_seconds__gte=10
-        ).exists()
+    # Pensou pelo menos 10 segundos em uma jogada
+    _check_testa_fria = triggered_by(MATCH_FINISHED)(
+        MoveExistsRule(time_taken_seconds__gte=10)
+    )
     
-    def _check_zen_master(self, user: User, match: Match) -> bool:
+    @triggered_by(MATCH_FINISHED)
+    def _check_zen_master(self, user: User, context: MatchContext) -> bool:
         return False  # Implementar lógica específica
     
-    def _check_alquimista(self, user: User, match: Match) -> bool:
-        # Ganhou 10 partidas (simplificado)
-        wins = MatchPlayer.objects.filter(user=user, is_winner=True).count()
-        return wins >= 10
+    # Ganhou 10 partidas (simplificado)
+    _check_alquimista = triggered_by(MATCH_FINISHED)(
+        CareerThresholdRule('total_wins', at_least=10)
+    )
     
-    def _check_karma(self, user: User, match: Match) -> bool:
-        return False  # Implementar lógica específica
-    
-    def _check_meme_bola8(self, user: User, match: Match) -> bool:
-        if not match:
-            return False
-        player = match.match_players.filter(user=user).first()
+    @triggered_by(MATCH_FINISHED)
+    def _check_karma(self, user: User, context: MatchContext) -> bool:
+        # Venceu depois de o adversário assumir a liderança com uma jogada na sorte
+        player = context.player(user, is_winner=True)
         if not player:
             return False
-        return Move.objects.filter(
-            match=match, 
-            player=player, 
-            move_type='mata_8',
-            turn_number=1
-        ).exists()
-    
-    def _check_espirito_olimpico(self, user: User, match: Match) -> bool:
+        return any(
+            state.team != player.team
+            and state.leader != player.team
+            and state.move.move_type == 'na_sorte'
+            for state in context.replay.lead_taken_by
+        )
+    
+    # Matou a bola 8 na primeira jogada
+    _check_meme_bola8 = triggered_by(MATCH_FINISHED, move_event('mata_8'))(
+        MoveExistsRule(move_type='mata_8', turn_number=1)
+    )
+    
+    @triggered_by(MATCH_FINISHED)
+    def _check_espirito_olimpico(self, user: User, context: MatchContext) -> bool:
         return False  # Implementar lógica específica
+    
+    # Progresso das regras imperativas (atual, alvo)
+    
+    def _progress_indesnucavel(self, user: User, data) -> Tuple[int, int]:
+        return data.max_opponent_moves_in_a_match('snooker'), 3
+    
+    def _progress_gato_doido(self, user: User, data) -> Tuple[int, int]:
+        return data.max_moves_in_a_match('erro', won_only=True), 3
+    
+    def _progress_roleta_sorte(self, user: User, data) -> Tuple[int, int]:
+        return data.max_moves_in_a_match('na_sorte', won_only=True), 3
+    
+    def _progress_nunca_erraram(self, user: User, data) -> Tuple[int, int]:
+        # Maior número de jogadas em uma partida sem erros nem faltas
+        clean = [
+            sum(counts.values()) for counts in data.move_counts.values()
+            if not counts['erro'] and not counts['falta']
+        ]
+        return max(clean, default=0), 5
+    
+    def _progress_colecionador(self, user: User, data) -> Tuple[int, int]:
+        return len(data.unlocked), 10
 
 
 # Instância global do engine
-achievement_engine = AchievementEngine()
\ No newline at end of file
+achievement_engine = AchievementEngine()
@@ -0,0 +1,114 @@
+from typing import Dict, Iterable, List, Tuple
+from django.contrib.auth import get_user_model
+from achievements.cache import invalidate_unlocked
+from achievements.models import Achievement, UserAchievement
+from accounts.stats import rebuild_user_stats
+from matches.models import MatchPlayer
+from .achievement_engine import CHAMPIONSHIP_FINISHED, achievement_engine
+from .match_context import MatchContext
+from .rule_compiler import DeclarativeRule
+
+User = get_user_model()
+
+# Regras que dependem das demais conquistas desbloqueadas são avaliadas por último
+LATE_RULES = ('colecionador',)
+
+
+def is_match_scoped(rule) -> bool:
+    """A regra depende só da partida avaliada (disparada apenas por eventos de partida)"""
+    events = getattr(rule, 'events', frozenset())
+    return bool(events) and CHAMPIONSHIP_FINISHED not in events
+
+
+def evaluate_chunk(codes: Iterable[str], user_ids: List, match_batch_size: int = 500) -> Tuple[int, int]:
+    """Reavalia regras para um bloco de usuários em todo o histórico de partidas.
+
+    Regras declarativas usam uma consulta por regra; as imperativas da partida
+    são executadas contra contextos carregados em lote, e as de carreira ou de
+    campeonato uma única vez por usuário. Os desbloqueios são gravados com
+    bulk_create(ignore_conflicts=True). Retorna (usuários, desbloqueios).
+    """
+    achievements = list(Achievement.objects.filter(is_active=True, code__in=list(codes)))
+    rules = {
+        achievement.code: achievement_engine.achievement_rules[achievement.code]
+        for achievement in achievements
+        if achievement.code in achievement_engine.achievement_rules
+    }
+    declarative = [a for a in achievements if isinstance(rules.get(a.code), DeclarativeRule)]
+    imperative = [a for a in achievements if a.code in rules and a not in declarative]
+    late = [a for a in imperative if a.code in LATE_RULES]
+    imperative = [a for a in imperative if a.code not in LATE_RULES]
+    # Regras de carreira ou de campeonato não dependem da partida: uma avaliação por usuário
+    per_match = [a for a in imperative if is_match_scoped(rules[a.code])]
+    per_user = [a for a in imperative if a not in per_match]
+
+    users = {user.pk: user for user in User.objects.filter(pk__in=user_ids)}
+    unlocked = UserAchievementSet(users)
+    pending: Dict[Tuple, object] = {}
+
+    def unlock(user_id, achievement, match_id=None):
+        key = (user_id, achievement.id)
+        if key not in pending and not unlocked.has(user_id, achievement.id):
+            pending[key] = match_id
+            unlocked.add(user_id, achievement.id)
+
+    # 1. Regras declarativas: uma consulta agrupada por regra para o bloco inteiro
+    for achievement in declarative:
+        for user_id in rules[achievement.code].users_satisfying(user_ids=list(users)):
+            unlock(user_id, achievement)
+
+    # 2. Regras imperativas da partida sobre cada partida histórica dos usuários do bloco
+    if per_match:
+        match_ids = list(
+            MatchPlayer.objects.filter(user_id__in=users).order_by('match_id')
+            .values_list('match_id', flat=True).distinct()
+        )
+        for start in range(0, len(match_ids), match_batch_size):
+            batch = match_ids[start:start + match_batch_size]
+            for context in MatchContext.bulk(batch, unlocked=unlocked.ids):
+                for player in context.players:
+                    if player.user_id not in users:
+                        continue
+                    for achievement in per_match:
+                        if not unlocked.has(player.user_id, achievement.id) and rules[achievement.code](player.user, context):
+                            unlock(player.user_id, achievement, context.match.pk)
+
+    # 3. Regras de carreira e de campeonato (sem partida) e, por fim, as que dependem dos desbloqueios
+    context = MatchContext(users=users.values(), unlocked=unlocked.ids)
+    for achievement in per_user + late:
+        for user in users.values():
+            if not unlocked.has(user.pk, achievement.id) and rules[achievement.code](user, context):
+                unlock(user.pk, achievement)
+
+    UserAchievement.objects.bulk_create(
+        [
+            UserAchievement(user_id=user_id, achievement_id=achievement_id, match_id=match_id)
+            for (user_id, achievement_id), match_id in pending.items()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+    # bulk_create não dispara sinais: atualiza estatísticas e cache explicitamente
+    affected = {user_id for user_id, _ in pending}
+    if affected:
+        rebuild_user_stats(affected)
+        invalidate_unlocked(*affected)
+
+    return len(users), len(pending)
+
+
+class UserAchievementSet:
+    """Conquistas já desbloqueadas de um bloco de usuários, carregadas do banco"""
+
+    def __init__(self, users: Dict):
+        self.ids: Dict = {user_id: set() for user_id in users}
+        rows = UserAchievement.objects.filter(user_id__in=users).values_list('user_id', 'achievement_id')
+        for user_id, achievement_id in rows:
+            self.ids[user_id].add(achievement_id)
+
+    def has(self, user_id, achievement_id) -> bool:
+        return achievement_id in self.ids.get(user_id, ())
+
+    def add(self, user_id, achievement_id) -> None:
+        self.ids.setdefault(user_id, set()).add(achievement_id)
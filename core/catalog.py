@@ -0,0 +1,72 @@
+import threading
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from achievements.cache import get_catalog_version
+from achievements.models import Achievement
+
+
+class CatalogEntry(NamedTuple):
+    achievement: Achievement
+    rule: Optional[Callable]
+
+
+class CatalogSnapshot:
+    """Conquistas ativas de uma versão do catálogo, indexadas por código e categoria"""
+
+    def __init__(self, version: str, achievements: Iterable[Achievement], rules: Dict[str, Callable]):
+        self.version = version
+        self.entries: List[CatalogEntry] = [
+            CatalogEntry(achievement, rules.get(achievement.code))
+            for achievement in achievements
+        ]
+        self.by_code: Dict[str, CatalogEntry] = {
+            entry.achievement.code: entry for entry in self.entries
+        }
+        self.by_category: Dict[str, List[CatalogEntry]] = {}
+        for entry in self.entries:
+            self.by_category.setdefault(entry.achievement.category, []).append(entry)
+
+
+class AchievementCatalog:
+    """Catálogo em memória das conquistas ativas, com as regras já associadas.
+
+    As conquistas mudam raramente: o catálogo é carregado uma vez por processo
+    e recarregado quando a versão compartilhada no cache muda (ver os sinais
+    de Achievement), de modo que todos os workers o invalidam juntos.
+    """
+
+    def __init__(self, rules: Dict[str, Callable]):
+        self.rules = rules
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> CatalogSnapshot:
+        version = get_catalog_version()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot.version != version:
+                    snapshot = CatalogSnapshot(
+                        version,
+                        Achievement.objects.filter(is_active=True),
+                        self.rules
+                    )
+                    self._snapshot = snapshot
+        return snapshot
+
+    def active(self, codes: Iterable[str] = None) -> List[Achievement]:
+        """Conquistas ativas, opcionalmente restritas a um conjunto de códigos"""
+        snapshot = self.snapshot()
+        if codes is None:
+            return [entry.achievement for entry in snapshot.entries]
+        return [snapshot.by_code[code].achievement for code in codes if code in snapshot.by_code]
+
+    def get(self, code: str) -> Optional[CatalogEntry]:
+        return self.snapshot().by_code.get(code)
+
+    def by_category(self) -> Dict[str, List[CatalogEntry]]:
+        return self.snapshot().by_category
+
+    def clear(self) -> None:
+        """Descarta o catálogo deste processo"""
+        self._snapshot = None
@@ -0,0 +1,94 @@
+import hashlib
+import json
+from functools import wraps
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+# Tempo máximo de processamento de uma requisição antes de a chave ser liberada
+LOCK_TIMEOUT = 60
+MAX_KEY_LENGTH = 255
+
+
+def idempotency_cache_key(request, key: str) -> str:
+    """Chave no cache, restrita ao usuário e ao endpoint"""
+    digest = hashlib.sha256(f'{request.path}:{key}'.encode()).hexdigest()
+    return f'idempotency:{request.user.pk}:{digest}'
+
+
+def _fingerprint(request) -> str:
+    data = request.data.dict() if hasattr(request.data, 'dict') else request.data
+    payload = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def idempotent(view_func):
+    """Torna um endpoint de escrita seguro para retentativas com o header Idempotency-Key.
+
+    A primeira requisição com uma chave é executada normalmente e a resposta
+    fica no cache compartilhado por IDEMPOTENCY_KEY_TTL segundos. Repetições
+    com a mesma chave recebem a resposta armazenada, sem validar, gravar ou
+    avaliar conquistas de novo. Reusar a chave com outro corpo retorna 422 e,
+    enquanto a primeira ainda está em processamento, 409. Respostas 5xx não
+    são armazenadas (a retentativa executa de novo).
+
+    Deve ficar abaixo de @api_view/@permission_classes (recebe a Request do DRF).
+    """
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or not key:
+            return view_func(request, *args, **kwargs)
+
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {'error': f'{IDEMPOTENCY_HEADER} deve ter no máximo {MAX_KEY_LENGTH} caracteres'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cache_key = idempotency_cache_key(request, key)
+        fingerprint = _fingerprint(request)
+
+        stored = cache.get(cache_key)
+        if stored is None:
+            if not cache.add(f'{cache_key}:lock', fingerprint, LOCK_TIMEOUT):
+                # Outra requisição com a mesma chave está em andamento (ou acabou de terminar)
+                stored = cache.get(cache_key)
+                if stored is None:
+                    return Response(
+                        {'error': 'Uma requisição com esta Idempotency-Key ainda está em processamento'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+            else:
+                # A primeira pode ter terminado e liberado a trava entre a leitura e o add
+                stored = cache.get(cache_key)
+                if stored is not None:
+                    cache.delete(f'{cache_key}:lock')
+
+        if stored is not None:
+            if stored['fingerprint'] != fingerprint:
+                return Response(
+                    {'error': 'Idempotency-Key já utilizada com outro conteúdo'},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            response = Response(stored['data'], status=stored['status'])
+            response[REPLAYED_HEADER] = 'true'
+            return response
+
+        try:
+            response = view_func(request, *args, **kwargs)
+            if response.status_code < 500:
+                cache.set(cache_key, {
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'data': response.data,
+                }, getattr(settings, 'IDEMPOTENCY_KEY_TTL', 60 * 60 * 24))
+            return response
+        finally:
+            cache.delete(f'{cache_key}:lock')
+
+    return wrapper
@@ -0,0 +1,128 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from achievements.models import Achievement
+from core.achievement_engine import achievement_engine
+from core.backfill import evaluate_chunk
+
+User = get_user_model()
+
+
+def _init_worker():
+    # Cada processo precisa das próprias conexões com o banco
+    django.setup()
+    connections.close_all()
+
+
+def _run_chunk(codes, user_ids, match_batch_size):
+    try:
+        return evaluate_chunk(codes, user_ids, match_batch_size)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Reavalia regras de conquistas para todos os usuários e todo o histórico de partidas, '
+        'em blocos processados em paralelo, com checkpoint para retomar execuções interrompidas'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('codes', nargs='*', help='Códigos das conquistas (padrão: todas as ativas)')
+        parser.add_argument('--chunk-size', type=int, default=200, help='Usuários por bloco')
+        parser.add_argument('--match-batch-size', type=int, default=500, help='Partidas carregadas por vez')
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help='Processos em paralelo (1 executa no processo atual)')
+        parser.add_argument('--checkpoint', default='backfill_achievements.checkpoint.json',
+                            help='Arquivo de checkpoint')
+        parser.add_argument('--restart', action='store_true', help='Ignora o checkpoint existente')
+    
+    def handle(self, *args, **options):
+        codes = self._resolve_codes(options['codes'])
+        checkpoint_path = options['checkpoint']
+        checkpoint = self._load_checkpoint(checkpoint_path, codes, options['restart'])
+        done_chunks = {tuple(chunk) for chunk in checkpoint['done']}
+        
+        # Blocos identificados pela faixa de ids (lo, hi); reprocessar um bloco é seguro (ignore_conflicts)
+        user_ids = [str(pk) for pk in User.objects.order_by('pk').values_list('pk', flat=True)]
+        size = options['chunk_size']
+        chunks = [user_ids[i:i + size] for i in range(0, len(user_ids), size)]
+        pending = [chunk for chunk in chunks if (chunk[0], chunk[-1]) not in done_chunks]
+        
+        self.stdout.write(
+            f'{len(codes)} regra(s), {len(user_ids)} usuário(s), '
+            f'{len(pending)} de {len(chunks)} bloco(s) pendente(s)'
+        )
+        
+        started = time.monotonic()
+        totals = {'users': 0, 'unlocked': 0}
+        
+        def record(chunk, result):
+            users, unlocked = result
+            totals['users'] += users
+            totals['unlocked'] += unlocked
+            checkpoint['done'].append([chunk[0], chunk[-1]])
+            self._save_checkpoint(checkpoint_path, checkpoint)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'[{len(checkpoint["done"])}/{len(chunks)}] '
+                f'{totals["users"]} usuário(s), {totals["unlocked"]} desbloqueio(s), '
+                f'{totals["users"] / elapsed if elapsed else 0:.1f} usuários/s'
+            )
+        
+        workers = max(1, options['workers'])
+        match_batch_size = options['match_batch_size']
+        if workers == 1:
+            for chunk in pending:
+                record(chunk, evaluate_chunk(codes, chunk, match_batch_size))
+        else:
+            # Conexões não podem ser herdadas pelos processos filhos
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                futures = {
+                    executor.submit(_run_chunk, codes, chunk, match_batch_size): chunk
+                    for chunk in pending
+                }
+                for future in as_completed(futures):
+                    record(futures[future], future.result())
+        
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Concluído: {totals["users"]} usuário(s), {totals["unlocked"]} desbloqueio(s) '
+            f'em {elapsed:.1f}s ({totals["users"] / elapsed if elapsed else 0:.1f} usuários/s)'
+        ))
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+    
+    def _resolve_codes(self, codes):
+        active = set(Achievement.objects.filter(is_active=True).values_list('code', flat=True))
+        known = set(achievement_engine.achievement_rules) & active
+        if not codes:
+            return sorted(known)
+        unknown = set(codes) - known
+        if unknown:
+            raise CommandError(f'Conquistas sem regra ou inativas: {", ".join(sorted(unknown))}')
+        return sorted(set(codes))
+    
+    def _load_checkpoint(self, path, codes, restart):
+        if restart or not os.path.exists(path):
+            return {'codes': codes, 'done': []}
+        with open(path) as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+        if checkpoint['codes'] != codes:
+            raise CommandError(
+                f'O checkpoint {path} foi gerado para outras regras; use --restart para descartá-lo'
+            )
+        self.stdout.write(f'Retomando a partir do checkpoint {path}')
+        return checkpoint
+    
+    def _save_checkpoint(self, path, checkpoint):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+        os.replace(tmp_path, path)
@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from achievements.cache import invalidate_unlocked, load_unlocked_ids
+from matches.models import Match, MatchPlayer
+from core.achievement_engine import achievement_engine
+from core.profiling import rule_profiler
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o custo de cada regra de conquista (tempo, consultas e tempo no banco) '
+        'reavaliando as partidas finalizadas mais recentes; nada é gravado'
+    )
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--matches', type=int, default=200, help='Quantidade de partidas reavaliadas')
+        parser.add_argument('--top', type=int, default=0, help='Mostra apenas as N regras mais custosas')
+    
+    def handle(self, *args, **options):
+        matches = list(
+            Match.objects.filter(status='finalizada').order_by('-ended_at')[:options['matches']]
+        )
+        
+        user_ids = set(
+            MatchPlayer.objects.filter(match__in=matches).values_list('user_id', flat=True)
+        )
+        # Conquistas desbloqueadas em um dicionário próprio: o cache compartilhado
+        # não pode guardar desbloqueios que serão desfeitos
+        unlocked = load_unlocked_ids(user_ids)
+        
+        rule_profiler.reset()
+        rule_profiler.force_enabled = True
+        try:
+            # Desbloqueios gerados durante a medição são descartados
+            with transaction.atomic():
+                for match in matches:
+                    achievement_engine.evaluate_match_achievements(match, unlocked=unlocked)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            rule_profiler.force_enabled = False
+            # Os sinais dos desbloqueios desfeitos mexeram no cache: recarrega do banco no próximo acesso
+            invalidate_unlocked(*user_ids)
+        
+        snapshot = rule_profiler.snapshot()
+        rules = list(snapshot['rules'].items())
+        if options['top']:
+            rules = rules[:options['top']]
+        
+        self.stdout.write(f"{len(matches)} partida(s), {snapshot['evaluations']} avaliação(ões)")
+        self.stdout.write(
+            f"{'regra':<20} {'execuções':>9} {'total ms':>10} {'média ms':>9} {'p95 ms':>7} "
+            f"{'máx ms':>8} {'consultas':>9} {'banco ms':>9}"
+        )
+        for code, stats in rules:
+            wall = stats['wall_ms']
+            self.stdout.write(
+                f"{code:<20} {wall['count']:>9} {wall['mean'] * wall['count']:>10.1f} {wall['mean']:>9.2f} "
+                f"{wall['p95']:>7} {wall['max']:>8.1f} {stats['queries']['mean']:>9.2f} "
+                f"{stats['db_ms']['mean']:>9.2f}"
+            )
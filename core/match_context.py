@@ -0,0 +1,148 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from accounts.models import UserStats
+from achievements.cache import get_unlocked_ids
+from matches.models import Match, MatchPlayer, Move
+
+User = get_user_model()
+
+
+class MatchContext:
+    """Snapshot em memória de uma partida usado na avaliação de conquistas.
+
+    Jogadores e jogadas são carregados uma única vez; dados de carreira e
+    conquistas já desbloqueadas são carregados sob demanda, em uma consulta
+    agrupada para todos os usuários do contexto.
+    """
+
+    def __init__(self, match: Match = None, users: Iterable[User] = (), championship=None,
+                 players: List[MatchPlayer] = None, moves: List[Move] = None, unlocked: Dict = None):
+        self.match = match
+        self.championship = championship
+        self.players: List[MatchPlayer] = players if players is not None else []
+        self.moves: List[Move] = moves if moves is not None else []
+
+        if match is not None and players is None:
+            self.players = list(match.match_players.select_related('user'))
+            self.moves = list(match.moves.all())
+
+        self._players_by_user: Dict = {player.user_id: player for player in self.players}
+        self._moves_by_player: Dict = defaultdict(list)
+        for move in self.moves:
+            self._moves_by_player[move.player_id].append(move)
+
+        self.users: Dict = {player.user_id: player.user for player in self.players}
+        for user in users:
+            self.users.setdefault(user.pk, user)
+
+        self._stats: Optional[Dict] = None
+        self._unlocked: Optional[Dict] = unlocked
+
+    @classmethod
+    def bulk(cls, match_ids: Iterable, unlocked: Dict = None) -> List['MatchContext']:
+        """Cria contextos para várias partidas com poucas consultas.
+
+        Jogadores e jogadas de todas as partidas são carregados de uma vez, e os
+        dados por usuário (estatísticas e conquistas) são
+        compartilhados entre os contextos. Um dicionário de conquistas já
+        desbloqueadas pode ser informado para ser atualizado em conjunto.
+        """
+        matches = {match.pk: match for match in Match.objects.filter(pk__in=list(match_ids))}
+        players = defaultdict(list)
+        for player in MatchPlayer.objects.filter(match_id__in=matches).select_related('user'):
+            players[player.match_id].append(player)
+        moves = defaultdict(list)
+        for move in Move.objects.filter(match_id__in=matches):
+            moves[move.match_id].append(move)
+
+        contexts = [
+            cls(match, players=players[match_id], moves=moves[match_id])
+            for match_id, match in matches.items()
+        ]
+
+        # Dados por usuário compartilhados entre todos os contextos
+        users = {}
+        for context in contexts:
+            users.update(context.users)
+        loader = cls(users=users.values())
+        stats = loader._load_stats()
+        if unlocked is None:
+            unlocked = loader._load_unlocked()
+
+        for context in contexts:
+            context.users = users
+            context._stats = stats
+            context._unlocked = unlocked
+        return contexts
+
+    # Dados da partida
+
+    def player(self, user: User, is_winner: bool = None) -> Optional[MatchPlayer]:
+        """Retorna o jogador do usuário na partida (opcionalmente filtrando por vitória)"""
+        player = self._players_by_user.get(user.pk)
+        if player is None or (is_winner is not None and player.is_winner != is_winner):
+            return None
+        return player
+
+    def moves_of(self, player: MatchPlayer) -> List[Move]:
+        """Jogadas do jogador, ordenadas por turno"""
+        return self._moves_by_player.get(player.pk, [])
+
+    def count_moves(self, player: MatchPlayer, *move_types: str) -> int:
+        """Conta as jogadas do jogador, opcionalmente restritas a alguns tipos"""
+        moves = self.moves_of(player)
+        if not move_types:
+            return len(moves)
+        return sum(1 for move in moves if move.move_type in move_types)
+
+    def count_opponent_moves(self, player: MatchPlayer, move_type: str) -> int:
+        """Conta as jogadas de um tipo feitas pelos demais jogadores"""
+        return sum(
+            1 for move in self.moves
+            if move.player_id != player.pk and move.move_type == move_type
+        )
+
+    @cached_property
+    def replay(self):
+        """Reprodução turno a turno das jogadas carregadas (ver core.replay)"""
+        from .replay import MatchReplay
+        return MatchReplay.from_context(self)
+
+    @cached_property
+    def champion(self) -> Optional[User]:
+        """Campeão do campeonato do contexto (calculado uma única vez)"""
+        if self.championship is None:
+            return None
+        return self.championship.champion
+
+    # Dados de carreira (carregados sob demanda para todos os usuários)
+
+    def stats(self, user: User) -> UserStats:
+        """Estatísticas de carreira do usuário (UserStats)"""
+        if self._stats is None:
+            self._stats = self._load_stats()
+        return self._stats.get(user.pk) or UserStats(user_id=user.pk)
+
+    # Conquistas já desbloqueadas
+
+    def unlocked(self, user: User) -> Set:
+        """Ids das conquistas que o usuário já possui (via cache compartilhado)"""
+        if self._unlocked is None:
+            self._unlocked = self._load_unlocked()
+        return self._unlocked.setdefault(user.pk, set())
+
+    def mark_unlocked(self, user: User, achievement_id) -> None:
+        self.unlocked(user).add(achievement_id)
+
+    # Carga agrupada para todos os usuários do contexto
+
+    def _load_stats(self) -> Dict:
+        return {
+            stats.user_id: stats
+            for stats in UserStats.objects.filter(user_id__in=self.users)
+        }
+
+    def _load_unlocked(self) -> Dict:
+        return get_unlocked_ids(self.users)
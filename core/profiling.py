@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Sequence
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Limites superiores dos buckets dos histogramas
+TIME_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50)
+
+
+class Histogram:
+    """Histograma de buckets fixos, com contagem, soma e máximo"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.buckets = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, fraction: float) -> float:
+        """Estimativa do percentil: limite superior do bucket que o contém"""
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for index, amount in enumerate(self.buckets):
+            seen += amount
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else 0,
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'max': round(self.max, 3),
+            'buckets': {
+                **{f'le_{bound}': amount for bound, amount in zip(self.bounds, self.buckets)},
+                'inf': self.buckets[-1],
+            },
+        }
+
+
+class RuleStats:
+    """Histogramas de uma regra: tempo total, número de consultas e tempo no banco"""
+
+    def __init__(self):
+        self.wall_ms = Histogram(TIME_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_ms = Histogram(TIME_BUCKETS_MS)
+        self.unlocked = 0
+
+    def observe(self, sample: 'RuleSample') -> None:
+        self.wall_ms.observe(sample.wall_ms)
+        self.queries.observe(sample.queries)
+        self.db_ms.observe(sample.db_ms)
+        self.unlocked += int(sample.result)
+
+    def snapshot(self) -> Dict:
+        return {
+            'wall_ms': self.wall_ms.snapshot(),
+            'queries': self.queries.snapshot(),
+            'db_ms': self.db_ms.snapshot(),
+            'unlocked': self.unlocked,
+        }
+
+
+class RuleSample:
+    """Medição de uma execução de regra"""
+
+    __slots__ = ('code', 'wall_ms', 'queries', 'db_ms', 'result')
+
+    def __init__(self, code: str):
+        self.code = code
+        self.wall_ms = 0.0
+        self.queries = 0
+        self.db_ms = 0.0
+        self.result = False
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper: conta e cronometra cada consulta feita pela regra
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - start) * 1000
+
+
+class Evaluation:
+    """Execuções de regras de uma avaliação (um usuário em um contexto)"""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.samples: List[RuleSample] = []
+
+    def run(self, code: str, rule_func, *args) -> bool:
+        sample = RuleSample(code)
+        start = time.perf_counter()
+        with connection.execute_wrapper(sample):
+            sample.result = bool(rule_func(*args))
+        sample.wall_ms = (time.perf_counter() - start) * 1000
+        self.samples.append(sample)
+        return sample.result
+
+    @property
+    def wall_ms(self) -> float:
+        return sum(sample.wall_ms for sample in self.samples)
+
+
+class _NoEvaluation:
+    """Avaliação sem instrumentação (profiling desligado)"""
+
+    @staticmethod
+    def run(code: str, rule_func, *args) -> bool:
+        return rule_func(*args)
+
+
+class RuleProfiler:
+    """Instrumentação opcional das regras do AchievementEngine.
+
+    Com ACHIEVEMENT_PROFILING ativo, cada execução de regra alimenta
+    histogramas em memória do processo (tempo, consultas e tempo no banco).
+    Com ACHIEVEMENT_SLOW_EVALUATION_MS > 0, avaliações mais lentas que o
+    limite são registradas no log com o detalhamento por regra.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rules: Dict[str, RuleStats] = {}
+        self.evaluations = 0
+        # Liga o profiling independentemente da configuração (ex.: comando de profiling)
+        self.force_enabled = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.force_enabled or getattr(settings, 'ACHIEVEMENT_PROFILING', False)
+
+    @property
+    def slow_evaluation_ms(self) -> float:
+        return getattr(settings, 'ACHIEVEMENT_SLOW_EVALUATION_MS', 0)
+
+    @contextmanager
+    def evaluation(self, label: str = ''):
+        if not (self.enabled or self.slow_evaluation_ms):
+            yield _NoEvaluation
+            return
+
+        evaluation = Evaluation(label)
+        yield evaluation
+        self._finish(evaluation)
+
+    def _finish(self, evaluation: Evaluation) -> None:
+        if self.enabled:
+            with self._lock:
+                self.evaluations += 1
+                for sample in evaluation.samples:
+                    self._rules.setdefault(sample.code, RuleStats()).observe(sample)
+
+        threshold = self.slow_evaluation_ms
+        if threshold and evaluation.wall_ms >= threshold:
+            slowest = sorted(evaluation.samples, key=lambda sample: sample.wall_ms, reverse=True)
+            logger.warning(
+                'Avaliação de conquistas lenta (%s): %.1fms, %d consultas; %s',
+                evaluation.label,
+                evaluation.wall_ms,
+                sum(sample.queries for sample in evaluation.samples),
+                ', '.join(
+                    f'{sample.code}={sample.wall_ms:.1f}ms/{sample.queries}q'
+                    for sample in slowest[:5]
+                )
+            )
+
+    def snapshot(self) -> Dict:
+        """Histogramas por regra, da mais custosa (tempo total) para a menos"""
+        with self._lock:
+            rules = sorted(self._rules.items(), key=lambda item: item[1].wall_ms.total, reverse=True)
+            return {
+                'evaluations': self.evaluations,
+                'rules': {code: stats.snapshot() for code, stats in rules},
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rules = {}
+            self.evaluations = 0
+
+
+rule_profiler = RuleProfiler()
@@ -0,0 +1,97 @@
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+from django.utils.functional import cached_property
+from achievements.models import UserAchievement
+from matches.models import MatchPlayer, Move
+from .rule_compiler import MoveExistsRule
+
+User = get_user_model()
+
+
+class ProgressData:
+    """Dados agregados de um usuário para o cálculo de progresso das conquistas.
+
+    Cada conjunto de dados é carregado sob demanda com uma única consulta
+    agrupada, de modo que o progresso de todas as regras custa um número
+    fixo de consultas.
+    """
+
+    def __init__(self, user: User, rules: Iterable = ()):
+        self.user = user
+        # Regras de existência são respondidas juntas, em uma única agregação
+        self._exists_rules: List[MoveExistsRule] = [
+            rule for rule in rules if isinstance(rule, MoveExistsRule)
+        ]
+
+    @cached_property
+    def stats(self):
+        return self.user.get_stats()
+
+    @cached_property
+    def players(self) -> List[MatchPlayer]:
+        """Participações do usuário (sem carregar as partidas)"""
+        return list(MatchPlayer.objects.filter(user=self.user).only('id', 'match_id', 'is_winner', 'points'))
+
+    @cached_property
+    def move_counts(self) -> Dict:
+        """Jogadas do usuário por participação e tipo: {player_id: Counter(move_type)}"""
+        counts = defaultdict(Counter)
+        rows = Move.objects.filter(player__user=self.user).order_by().values(
+            'player_id', 'move_type'
+        ).annotate(total=Count('id'))
+        for row in rows:
+            counts[row['player_id']][row['move_type']] = row['total']
+        return counts
+
+    @cached_property
+    def opponent_move_counts(self) -> Dict:
+        """Jogadas dos adversários nas partidas do usuário: {match_id: Counter(move_type)}"""
+        counts = defaultdict(Counter)
+        rows = Move.objects.filter(
+            match__match_players__user=self.user
+        ).exclude(player__user=self.user).order_by().values(
+            'match_id', 'move_type'
+        ).annotate(total=Count('id'))
+        for row in rows:
+            counts[row['match_id']][row['move_type']] = row['total']
+        return counts
+
+    @cached_property
+    def _move_flags(self) -> Dict[int, bool]:
+        if not self._exists_rules:
+            return {}
+        flags = Move.objects.filter(player__user=self.user).aggregate(**{
+            f'rule_{index}': Count('id', filter=Q(**rule.lookups))
+            for index, rule in enumerate(self._exists_rules)
+        })
+        return {index: flags[f'rule_{index}'] > 0 for index in range(len(self._exists_rules))}
+
+    @cached_property
+    def unlocked(self) -> Dict:
+        """Conquistas desbloqueadas: {achievement_id: unlocked_at}"""
+        return dict(
+            UserAchievement.objects.filter(user=self.user).values_list('achievement_id', 'unlocked_at')
+        )
+
+    # Consultas sobre os dados carregados
+
+    def max_moves_in_a_match(self, *move_types: str, won_only: bool = False) -> int:
+        """Maior quantidade de jogadas dos tipos informados em uma mesma partida"""
+        winners = {player.pk for player in self.players if player.is_winner} if won_only else None
+        best = 0
+        for player_id, counts in self.move_counts.items():
+            if won_only and player_id not in winners:
+                continue
+            total = sum(counts[t] for t in move_types) if move_types else sum(counts.values())
+            best = max(best, total)
+        return best
+
+    def max_opponent_moves_in_a_match(self, move_type: str) -> int:
+        return max((counts[move_type] for counts in self.opponent_move_counts.values()), default=0)
+
+    def move_exists(self, rule: MoveExistsRule) -> bool:
+        if rule not in self._exists_rules:
+            return Move.objects.filter(player__user=self.user, **rule.lookups).exists()
+        return self._move_flags[self._exists_rules.index(rule)]
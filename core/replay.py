@@ -0,0 +1,131 @@
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional
+from django.db.models import F
+from matches.models import Match, Move
+
+# Ordem determinística das jogadas de uma partida
+MOVE_ORDERING = ('turn_number', 'created_at', 'id')
+
+
+class TurnState(NamedTuple):
+    """Estado da partida logo após uma jogada"""
+    turn_number: int
+    move: Move
+    team: str
+    scores: Dict[str, int]
+    leader: Optional[str]
+    lead: int
+    lead_changed: bool
+    run: int
+    seconds_since_previous: Optional[float]
+
+    def as_dict(self) -> Dict:
+        return {
+            'turn_number': self.turn_number,
+            'move_id': self.move.pk,
+            'player_id': self.move.player_id,
+            'team': self.team,
+            'move_type': self.move.move_type,
+            'points': self.move.points,
+            'scores': self.scores,
+            'leader': self.leader,
+            'lead': self.lead,
+            'lead_changed': self.lead_changed,
+            'run': self.run,
+            'seconds_since_previous': self.seconds_since_previous,
+        }
+
+
+class MatchReplay:
+    """Reprodução determinística de uma partida a partir das suas jogadas.
+
+    As jogadas, em ordem de turno, são dobradas em um estado por turno: placar
+    por time, liderança, viradas de liderança, sequência de jogadas pontuadas
+    do jogador e tempo desde a jogada anterior. O resumo acumulado (maior
+    desvantagem por time, maior sequência por jogador etc.) é compartilhado
+    por regras de conquistas, estatísticas e pelo endpoint de timeline.
+    """
+
+    def __init__(self, teams: Iterable[str] = ('A', 'B')):
+        self.scores: Dict[str, int] = {team: 0 for team in teams}
+        self.leader: Optional[str] = None
+        self.turns: List[TurnState] = []
+
+        # Resumo acumulado
+        self.lead_changes = 0
+        self.max_deficit: Dict[str, int] = {team: 0 for team in self.scores}
+        self.best_run: Dict = {}
+        self.lead_taken_by: List[TurnState] = []
+
+        self._run_player = None
+        self._run = 0
+        self._previous_at = None
+
+    @classmethod
+    def from_context(cls, context) -> 'MatchReplay':
+        """Reproduz as jogadas já carregadas em um MatchContext (sem consultas)"""
+        teams = {player.pk: player.team for player in context.players}
+        replay = cls(sorted(set(teams.values())) or ('A', 'B'))
+        moves = sorted(context.moves, key=lambda move: (move.turn_number, move.created_at, str(move.pk)))
+        for move in moves:
+            replay.apply(move, teams.get(move.player_id))
+        return replay
+
+    def stream(self, match: Match) -> Iterator[TurnState]:
+        """Reproduz uma partida em uma única passada sobre uma única consulta.
+
+        Os estados são produzidos sob demanda (não ficam em self.turns); o
+        resumo acumulado fica disponível ao final da iteração.
+        """
+        moves = Move.objects.filter(match=match).annotate(
+            team=F('player__team')
+        ).order_by(*MOVE_ORDERING)
+        for move in moves.iterator():
+            yield self.apply(move, move.team, keep=False)
+
+    def apply(self, move: Move, team: Optional[str], keep: bool = True) -> TurnState:
+        """Aplica uma jogada ao estado e retorna o estado do turno"""
+        if team is not None:
+            self.scores[team] = self.scores.get(team, 0) + move.points
+            self.max_deficit.setdefault(team, 0)
+
+        # Liderança e desvantagem de cada time
+        ranking = sorted(self.scores.items(), key=lambda item: item[1], reverse=True)
+        top_team, top_score = ranking[0]
+        second_score = ranking[1][1] if len(ranking) > 1 else 0
+        leader = top_team if top_score > second_score else None
+        for scored_team, score in self.scores.items():
+            self.max_deficit[scored_team] = max(self.max_deficit[scored_team], top_score - score)
+
+        lead_changed = leader is not None and leader != self.leader
+        if lead_changed and self.leader is not None:
+            self.lead_changes += 1
+        self.leader = leader if leader is not None else self.leader
+
+        # Sequência de jogadas pontuadas do mesmo jogador
+        if move.player_id != self._run_player:
+            self._run_player = move.player_id
+            self._run = 0
+        self._run = self._run + 1 if move.points > 0 else 0
+        self.best_run[move.player_id] = max(self.best_run.get(move.player_id, 0), self._run)
+
+        seconds = None
+        if self._previous_at is not None and move.created_at is not None:
+            seconds = (move.created_at - self._previous_at).total_seconds()
+        self._previous_at = move.created_at
+
+        state = TurnState(
+            turn_number=move.turn_number,
+            move=move,
+            team=team,
+            scores=dict(self.scores),
+            leader=leader,
+            lead=top_score - second_score,
+            lead_changed=lead_changed,
+            run=self._run,
+            seconds_since_previous=seconds,
+        )
+        if lead_changed:
+            self.lead_taken_by.append(state)
+        if keep:
+            self.turns.append(state)
+        return state
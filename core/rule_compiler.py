@@ -0,0 +1,151 @@
+import operator
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Set, Tuple
+from django.contrib.auth import get_user_model
+from django.db.models import Count, QuerySet
+from accounts.models import UserStats
+from matches.models import Move
+from .match_context import MatchContext
+
+User = get_user_model()
+
+# Lookups suportados na avaliação em memória
+LOOKUP_OPERATORS = {
+    'exact': operator.eq,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'in': lambda value, expected: value in expected,
+}
+
+
+def matches_lookups(obj, lookups: Dict[str, Any]) -> bool:
+    """Aplica lookups no estilo do ORM (campo__operador=valor) a um objeto em memória"""
+    for key, expected in lookups.items():
+        field, _, lookup = key.partition('__')
+        lookup = lookup or 'exact'
+        if lookup not in LOOKUP_OPERATORS:
+            raise ValueError(f'Lookup não suportado em regras declarativas: {key}')
+
+        value = getattr(obj, field)
+        if value is None and lookup != 'exact':
+            return False
+        if not LOOKUP_OPERATORS[lookup](value, expected):
+            return False
+    return True
+
+
+class DeclarativeRule(ABC):
+    """Regra de conquista declarativa.
+
+    A mesma definição é avaliada em memória contra um MatchContext (regra
+    chamável, como as demais regras do engine) ou compilada para uma única
+    consulta agrupada que responde quais usuários de um conjunto a satisfazem.
+    Subclasses precisam implementar as três formas; uma regra incompleta falha
+    ao ser instanciada (no carregamento do engine), não durante uma avaliação.
+    """
+
+    @abstractmethod
+    def __call__(self, user: User, context: MatchContext) -> bool:
+        """Avaliação em memória contra o contexto da partida"""
+
+    @abstractmethod
+    def users_queryset(self, user_ids: Iterable = None, match_ids: Iterable = None) -> QuerySet:
+        """Consulta que retorna os ids dos usuários que satisfazem a regra"""
+
+    @abstractmethod
+    def progress(self, user: User, data) -> Tuple[int, int]:
+        """Progresso (atual, alvo) do usuário, a partir de um ProgressData"""
+
+    def users_satisfying(self, user_ids: Iterable = None, match_ids: Iterable = None) -> Set:
+        """Ids dos usuários (opcionalmente restritos a um conjunto) que satisfazem a regra"""
+        return set(self.users_queryset(user_ids, match_ids))
+
+    @staticmethod
+    def _scope_moves(queryset: QuerySet, user_ids: Iterable = None, match_ids: Iterable = None) -> QuerySet:
+        if user_ids is not None:
+            queryset = queryset.filter(player__user_id__in=user_ids)
+        if match_ids is not None:
+            queryset = queryset.filter(match_id__in=match_ids)
+        return queryset
+
+
+class MoveCountRule(DeclarativeRule):
+    """Pelo menos N jogadas de certos tipos do mesmo jogador em uma partida"""
+
+    def __init__(self, *move_types: str, at_least: int):
+        self.move_types = move_types
+        self.at_least = at_least
+
+    def __repr__(self):
+        return f'MoveCountRule({self.move_types!r}, at_least={self.at_least})'
+
+    def __call__(self, user: User, context: MatchContext) -> bool:
+        player = context.player(user)
+        if not player:
+            return False
+        return context.count_moves(player, *self.move_types) >= self.at_least
+
+    def users_queryset(self, user_ids: Iterable = None, match_ids: Iterable = None) -> QuerySet:
+        moves = Move.objects.all()
+        if self.move_types:
+            moves = moves.filter(move_type__in=self.move_types)
+        moves = self._scope_moves(moves, user_ids, match_ids)
+
+        # MatchPlayer identifica o usuário em uma partida: agrupa por jogador
+        return moves.order_by().values('player_id', 'player__user_id').annotate(
+            total=Count('id')
+        ).filter(
+            total__gte=self.at_least
+        ).values_list('player__user_id', flat=True).distinct()
+
+    def progress(self, user: User, data) -> Tuple[int, int]:
+        return data.max_moves_in_a_match(*self.move_types), self.at_least
+
+
+class MoveExistsRule(DeclarativeRule):
+    """Existe uma jogada do usuário que atende aos lookups (ex.: consecutive_count__gte=5)"""
+
+    def __init__(self, **lookups):
+        self.lookups = lookups
+
+    def __repr__(self):
+        return f'MoveExistsRule({self.lookups!r})'
+
+    def __call__(self, user: User, context: MatchContext) -> bool:
+        player = context.player(user)
+        if not player:
+            return False
+        return any(matches_lookups(move, self.lookups) for move in context.moves_of(player))
+
+    def users_queryset(self, user_ids: Iterable = None, match_ids: Iterable = None) -> QuerySet:
+        moves = self._scope_moves(Move.objects.filter(**self.lookups), user_ids, match_ids)
+        return moves.order_by().values_list('player__user_id', flat=True).distinct()
+
+    def progress(self, user: User, data) -> Tuple[int, int]:
+        return int(data.move_exists(self)), 1
+
+
+class CareerThresholdRule(DeclarativeRule):
+    """Um contador de carreira do usuário (UserStats) atingiu um valor mínimo"""
+
+    def __init__(self, field: str, at_least: int):
+        self.field = field
+        self.at_least = at_least
+
+    def __repr__(self):
+        return f'CareerThresholdRule({self.field!r}, at_least={self.at_least})'
+
+    def __call__(self, user: User, context: MatchContext) -> bool:
+        return getattr(context.stats(user), self.field) >= self.at_least
+
+    def users_queryset(self, user_ids: Iterable = None, match_ids: Iterable = None) -> QuerySet:
+        # Contadores de carreira não dependem das partidas: match_ids é ignorado
+        stats = UserStats.objects.filter(**{f'{self.field}__gte': self.at_least})
+        if user_ids is not None:
+            stats = stats.filter(user_id__in=user_ids)
+        return stats.values_list('user_id', flat=True)
+
+    def progress(self, user: User, data) -> Tuple[int, int]:
+        return getattr(data.stats, self.field), self.at_least
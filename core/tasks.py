@@ -0,0 +1,127 @@
+from celery import shared_task
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from matches.models import Match
+from .achievement_engine import achievement_engine, MATCH_FINISHED
+
+User = get_user_model()
+
+# Enquanto a chave existir, novos pedidos para o mesmo alvo são descartados
+PENDING_TIMEOUT = 60 * 5
+
+
+def _pending_key(*parts) -> str:
+    return 'achievements:pending:' + ':'.join(str(part) for part in parts)
+
+
+def _moves_pending_key(match_id, user_ids, events) -> str:
+    return _pending_key('moves', match_id, ','.join(events), ','.join(user_ids))
+
+
+def _schedule(key: str, task, *args) -> bool:
+    """Enfileira a tarefa após o commit, a menos que já exista uma pendente para a chave.
+
+    A chave só é criada no commit: se a transação for desfeita nada fica
+    bloqueado, e se o envio ao broker falhar a chave é liberada.
+    """
+    if cache.get(key) is not None:
+        return False
+
+    def enqueue():
+        # Vários agendamentos na mesma transação: apenas o primeiro enfileira
+        if not cache.add(key, True, PENDING_TIMEOUT):
+            return
+        try:
+            task.delay(*args)
+        except Exception:
+            cache.delete(key)
+            raise
+
+    transaction.on_commit(enqueue)
+    return True
+
+
+def schedule_user_evaluation(user: User, match: Match, event: str) -> bool:
+    """Agenda a avaliação das conquistas de um usuário disparadas por um evento da partida"""
+    if not achievement_engine.rule_codes_for(event):
+        return False
+    key = _pending_key('user', user.pk, match.pk, event)
+    return _schedule(key, evaluate_user_achievements_task, str(user.pk), str(match.pk), event)
+
+
+def schedule_match_evaluation(match: Match, event: str = MATCH_FINISHED) -> bool:
+    """Agenda a avaliação das conquistas de todos os jogadores de uma partida"""
+    if not achievement_engine.rule_codes_for(event):
+        return False
+    key = _pending_key('match', match.pk, event)
+    return _schedule(key, evaluate_match_achievements_task, str(match.pk), event)
+
+
+def schedule_moves_evaluation(match: Match, user_ids, events) -> bool:
+    """Agenda uma única avaliação para um lote de jogadas (usuários e eventos envolvidos)"""
+    events = sorted({event for event in events if achievement_engine.rule_codes_for(event)})
+    if not events:
+        return False
+    user_ids = sorted(str(user_id) for user_id in user_ids)
+    # Lotes seguidos dos mesmos jogadores e eventos compartilham uma avaliação pendente
+    key = _moves_pending_key(match.pk, user_ids, events)
+    return _schedule(key, evaluate_moves_achievements_task, str(match.pk), user_ids, events)
+
+
+def schedule_championship_evaluation(championship) -> bool:
+    """Agenda a avaliação das conquistas de fim de campeonato"""
+    key = _pending_key('championship', championship.pk)
+    return _schedule(key, evaluate_championship_achievements_task, str(championship.pk))
+
+
+@shared_task(ignore_result=True)
+def evaluate_user_achievements_task(user_id: str, match_id: str, event: str):
+    """Avalia as conquistas de um usuário para um evento da partida"""
+    # Libera a chave antes de ler o banco: jogadas feitas a partir daqui agendam nova avaliação
+    cache.delete(_pending_key('user', user_id, match_id, event))
+
+    user = User.objects.filter(id=user_id).first()
+    match = Match.objects.filter(id=match_id).first()
+    if user is None or match is None:
+        return
+
+    achievement_engine.evaluate_user_achievements(user, match, event=event)
+
+
+@shared_task(ignore_result=True)
+def evaluate_match_achievements_task(match_id: str, event: str = MATCH_FINISHED):
+    """Avalia as conquistas de todos os jogadores de uma partida"""
+    cache.delete(_pending_key('match', match_id, event))
+
+    match = Match.objects.filter(id=match_id).first()
+    if match is None:
+        return
+
+    achievement_engine.evaluate_match_achievements(match, event=event)
+
+
+@shared_task(ignore_result=True)
+def evaluate_moves_achievements_task(match_id: str, user_ids: list, events: list):
+    """Avalia as conquistas disparadas por um lote de jogadas de uma partida"""
+    cache.delete(_moves_pending_key(match_id, user_ids, events))
+
+    match = Match.objects.filter(id=match_id).first()
+    if match is None:
+        return
+
+    achievement_engine.evaluate_moves_achievements(match, user_ids, events)
+
+
+@shared_task(ignore_result=True)
+def evaluate_championship_achievements_task(championship_id: str):
+    """Avalia as conquistas dos participantes de um campeonato finalizado"""
+    from championships.models import Championship
+
+    cache.delete(_pending_key('championship', championship_id))
+
+    championship = Championship.objects.filter(id=championship_id).first()
+    if championship is None:
+        return
+
+    achievement_engine.evaluate_championship_achievements(championship)
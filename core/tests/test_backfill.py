@@ -0,0 +1,29 @@
+from unittest import mock
+import pytest
+from achievements.models import Achievement, UserAchievement
+from core.achievement_engine import achievement_engine
+from core.backfill import evaluate_chunk
+from matches.tests.factories import MatchFactory, MatchPlayerFactory
+
+MATCHES = 4
+
+
+@pytest.mark.django_db
+def test_career_and_championship_rules_run_once_per_user():
+    for code in ('campeao', 'acabou_comigo'):
+        Achievement.objects.create(code=code, name=code, description=code, category='habilidade')
+    player = MatchPlayerFactory(is_winner=False, points=1)
+    for _ in range(MATCHES - 1):
+        MatchPlayerFactory(match=MatchFactory(), user=player.user, is_winner=False, points=1)
+
+    rules = achievement_engine.achievement_rules
+    campeao = mock.Mock(return_value=False, events=rules['campeao'].events)
+    acabou_comigo = mock.Mock(wraps=rules['acabou_comigo'], events=rules['acabou_comigo'].events)
+    with mock.patch.dict(rules, {'campeao': campeao, 'acabou_comigo': acabou_comigo}):
+        users, unlocks = evaluate_chunk(['campeao', 'acabou_comigo'], [player.user_id])
+
+    assert (users, unlocks) == (1, 0)
+    # Regra da partida: uma vez por partida histórica; regra de campeonato: uma vez por usuário
+    assert acabou_comigo.call_count == MATCHES
+    assert campeao.call_count == 1
+    assert not UserAchievement.objects.exists()
@@ -0,0 +1,80 @@
+from unittest import mock
+import pytest
+from django.core.cache import cache
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from accounts.tests.factories import UserFactory
+from core import idempotency
+from core.idempotency import REPLAYED_HEADER, idempotent
+
+
+@pytest.fixture
+def view():
+    calls = []
+
+    @api_view(['POST'])
+    @idempotent
+    def create(request):
+        calls.append(request.data)
+        return Response({'created': len(calls)}, status=201)
+
+    create.calls = calls
+    return create
+
+
+@pytest.fixture
+def post():
+    user = UserFactory()
+    factory = APIRequestFactory()
+
+    def post(data, key='chave-1'):
+        request = factory.post('/api/recurso/', data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=user)
+        return request
+    return post
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_retry_replays_stored_response(view, post):
+    first = view(post({'points': 1}))
+    retry = view(post({'points': 1}))
+
+    assert (first.status_code, retry.status_code) == (201, 201)
+    assert retry.data == first.data
+    assert retry[REPLAYED_HEADER] == 'true'
+    assert len(view.calls) == 1
+
+
+@pytest.mark.django_db
+def test_reused_key_with_other_body_is_rejected(view, post):
+    view(post({'points': 1}))
+
+    assert view(post({'points': 2})).status_code == 422
+    assert len(view.calls) == 1
+
+
+@pytest.mark.django_db
+def test_response_stored_between_read_and_lock_is_replayed(view, post):
+    view(post({'points': 1}))
+    real_get = cache.get
+    reads = []
+
+    def stale_get(key, *args, **kwargs):
+        # A primeira leitura ocorre antes de a requisição original gravar a resposta
+        reads.append(key)
+        return None if len(reads) == 1 else real_get(key, *args, **kwargs)
+
+    with mock.patch.object(idempotency.cache, 'get', side_effect=stale_get):
+        retry = view(post({'points': 1}))
+
+    assert retry[REPLAYED_HEADER] == 'true'
+    assert len(view.calls) == 1
+    assert real_get(f'{reads[0]}:lock') is None
@@ -0,0 +1,181 @@
+import re
+from datetime import timedelta
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from accounts.models import UserStats
+from accounts.stats import rebuild_user_stats, record_match_finished
+from accounts.streaks import rebuild_user_streaks
+from accounts.tests.factories import UserFactory
+from achievements.cache import load_unlocked_ids
+from achievements.models import Achievement, UserAchievement
+from core.achievement_engine import achievement_engine
+from core.match_context import MatchContext
+from matches.models import Match, MatchPlayer, Move
+from matches.tests.factories import MatchFactory, MatchPlayerFactory, MoveFactory
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(connection.vendor != 'sqlite', reason='Interpreta o EXPLAIN QUERY PLAN do SQLite'),
+]
+
+# Tabelas que crescem com o uso: qualquer SCAN delas é uma regressão, mesmo
+# percorrendo um índice inteiro ("SCAN moves USING COVERING INDEX ..."); só
+# "SEARCH ... USING ... (coluna=?)" limita a leitura às linhas procuradas
+HOT_TABLES = {
+    Match._meta.db_table,
+    MatchPlayer._meta.db_table,
+    Move._meta.db_table,
+    UserAchievement._meta.db_table,
+    UserStats._meta.db_table,
+}
+
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)\b')
+USED_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\w+)')
+# Apelidos gerados pelo ORM em subconsultas e joins repetidos: "match_players" U0, "users" T4
+TABLE_ALIAS = re.compile(r'"(\w+)"\s+(?:AS\s+)?([A-Z]\d+)\b')
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    achievement_engine.catalog.clear()
+    yield
+    cache.clear()
+    achievement_engine.catalog.clear()
+
+
+@pytest.fixture
+def finished_match():
+    """Partida finalizada com jogadas e uma conquista desbloqueada"""
+    Achievement.objects.bulk_create([
+        Achievement(code=code, name=code, description=code, category='habilidade')
+        for code in achievement_engine.achievement_rules
+    ])
+    achievement_engine.catalog.clear()
+
+    user, opponent = UserFactory(), UserFactory()
+    match = MatchFactory(created_by=user)
+    player = MatchPlayerFactory(match=match, user=user, team='A', position=0, is_winner=True)
+    other = MatchPlayerFactory(match=match, user=opponent, team='B', position=1)
+    for move_player, move_type, points in [
+        (player, 'normal', 1), (other, 'falta', -1), (player, 'combo', 2), (player, 'mata_8', 1),
+    ]:
+        MoveFactory(player=move_player, move_type=move_type, points=points)
+
+    match.status = 'finalizada'
+    match.ended_at = timezone.now()
+    match.save()
+    match.sync_winner()
+    record_match_finished(match)
+
+    UserAchievement.objects.create(user=user, achievement=Achievement.objects.first(), match=match)
+    return user, opponent, match
+
+
+def scenarios(user, opponent, match):
+    """(rótulo, execução, índices que o plano deve usar) das consultas críticas"""
+    factory = APIRequestFactory()
+    user_ids = [user.pk, opponent.pk]
+    since = (timezone.now() - timedelta(days=1)).isoformat()
+
+    def call(name, query=None, **kwargs):
+        path = reverse(name, kwargs=kwargs)
+        request = factory.get(path, query or {})
+        force_authenticate(request, user=user)
+        return lambda: resolve(path).func(request, **kwargs)
+
+    def declarative_rules(**scope):
+        def run():
+            for code in achievement_engine.rule_codes_for():
+                users = achievement_engine.users_satisfying(code, **scope)
+                if users is not None:
+                    list(users)
+        return run
+
+    return [
+        (
+            'contexto da partida',
+            lambda: MatchContext.bulk([match.pk], unlocked=load_unlocked_ids(user_ids)),
+            (),
+        ),
+        (
+            'regras declarativas da partida',
+            declarative_rules(user_ids=user_ids, match_ids=[match.pk]),
+            ('moves_match_player_type_idx',),
+        ),
+        # Como no backfill: todas as partidas de um conjunto de usuários
+        ('regras declarativas dos usuários', declarative_rules(user_ids=user_ids), ()),
+        (
+            'avaliação de conquistas',
+            lambda: achievement_engine.evaluate_match_achievements(match, unlocked=load_unlocked_ids(user_ids)),
+            (),
+        ),
+        (
+            'recálculo de estatísticas',
+            lambda: rebuild_user_stats(user_ids),
+            ('match_players_user_win_idx', 'moves_player_type_idx', 'user_ach_user_unlocked_idx'),
+        ),
+        ('recálculo de sequências', lambda: rebuild_user_streaks(user_ids), ('match_players_user_win_idx',)),
+        ('estatísticas de partidas', call('matches:match_stats'), ('match_players_user_win_idx',)),
+        ('histórico de partidas', call('matches:match_history'), ()),
+        (
+            'partidas por status',
+            call('matches:match_list_create', {'status': 'finalizada'}),
+            ('matches_status_started_idx',),
+        ),
+        ('jogadas novas', call('matches:add_move', {'after_turn': 2}, match_id=match.pk), ()),
+        (
+            'progresso das conquistas',
+            call('achievements:all_achievements_progress'),
+            ('moves_player_type_idx', 'user_ach_user_unlocked_idx'),
+        ),
+        (
+            'conquistas recentes',
+            call('achievements:recent_unlocks', {'since': since}),
+            ('user_ach_user_unlocked_idx',),
+        ),
+    ]
+
+
+def plan_regressions(queries, indexes):
+    """Leituras completas de tabelas grandes e índices esperados que o plano não usou"""
+    failures = []
+    used = set()
+    with connection.cursor() as cursor:
+        for query in queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                continue
+            aliases = {alias: table for table, alias in TABLE_ALIAS.findall(sql)}
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            for *_, detail in cursor.fetchall():
+                scan = FULL_SCAN.match(detail)
+                if scan and aliases.get(scan.group(1), scan.group(1)) in HOT_TABLES:
+                    failures.append(f'{detail}\n  {sql[:300]}')
+                index = USED_INDEX.search(detail)
+                if index:
+                    used.add(index.group(1))
+    failures.extend(f'índice {index} não utilizado' for index in indexes if index not in used)
+    return failures
+
+
+def test_critical_queries_search_hot_tables_by_index(finished_match):
+    failures = []
+    for label, run, indexes in scenarios(*finished_match):
+        with CaptureQueriesContext(connection) as captured:
+            run()
+        failures.extend(f'[{label}] {failure}' for failure in plan_regressions(captured.captured_queries, indexes))
+
+    assert not failures, '\n'.join(failures)
+
+
+def test_index_traversal_counts_as_full_scan():
+    queries = [{'sql': f'SELECT "player_id" FROM "{Move._meta.db_table}" U0 ORDER BY U0."player_id"'}]
+
+    [failure] = plan_regressions(queries, ())
+    assert failure.startswith('SCAN U0 USING COVERING INDEX ')
@@ -0,0 +1,12 @@
+import pytest
+from core.rule_compiler import DeclarativeRule
+
+
+def test_incomplete_declarative_rule_fails_on_instantiation():
+    class CallableOnly(DeclarativeRule):
+        def __call__(self, user, context):
+            return True
+
+    with pytest.raises(TypeError, match='users_queryset'):
+        CallableOnly()
+
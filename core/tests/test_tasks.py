@@ -0,0 +1,45 @@
+from unittest import mock
+import pytest
+from django.core.cache import cache
+from core import tasks
+from core.achievement_engine import move_event
+from matches.tests.factories import MatchPlayerFactory
+
+EVENTS = [move_event('snooker')]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_bulk_move_batches_share_one_pending_evaluation(django_capture_on_commit_callbacks):
+    player = MatchPlayerFactory()
+
+    with mock.patch.object(tasks.evaluate_moves_achievements_task, 'delay') as delay:
+        with django_capture_on_commit_callbacks(execute=True):
+            assert tasks.schedule_moves_evaluation(player.match, [player.user_id], EVENTS)
+            assert tasks.schedule_moves_evaluation(player.match, [player.user_id], EVENTS)
+        # Já pendente: o próximo lote não enfileira outra avaliação
+        with django_capture_on_commit_callbacks(execute=True):
+            assert not tasks.schedule_moves_evaluation(player.match, [player.user_id], EVENTS)
+
+    delay.assert_called_once_with(str(player.match_id), [str(player.user_id)], EVENTS)
+
+
+@pytest.mark.django_db
+def test_running_evaluation_releases_the_pending_key(django_capture_on_commit_callbacks):
+    player = MatchPlayerFactory()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        tasks.schedule_moves_evaluation(player.match, [player.user_id], EVENTS)
+
+    # Tarefas rodam no próprio processo nos testes: a chave já foi liberada
+    with mock.patch.object(tasks.evaluate_moves_achievements_task, 'delay') as delay:
+        with django_capture_on_commit_callbacks(execute=True):
+            assert tasks.schedule_moves_evaluation(player.match, [player.user_id], EVENTS)
+
+    delay.assert_called_once()
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class MatchesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'matches'
-    verbose_name = 'Matches'
\ No newline at end of file
+    verbose_name = 'Matches'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
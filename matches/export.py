@@ -0,0 +1,76 @@
+import csv
+from datetime import datetime
+from typing import Iterator
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import MatchPlayer
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+# Colunas do histórico exportado: uma linha por jogada (ou por jogador sem jogadas)
+EXPORT_COLUMNS = (
+    ('match_id', 'match_id'),
+    ('match_status', 'match__status'),
+    ('started_at', 'match__started_at'),
+    ('ended_at', 'match__ended_at'),
+    ('duration_minutes', 'match__duration_minutes'),
+    ('winner_id', 'match__winner_id'),
+    ('player_id', 'id'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('display_name', 'user__display_name'),
+    ('team', 'team'),
+    ('position', 'position'),
+    ('is_winner', 'is_winner'),
+    ('player_points', 'points'),
+    ('turn_number', 'moves__turn_number'),
+    ('move_type', 'moves__move_type'),
+    ('move_points', 'moves__points'),
+    ('description', 'moves__description'),
+    ('is_winning_move', 'moves__is_winning_move'),
+    ('balls_potted', 'moves__balls_potted'),
+    ('consecutive_count', 'moves__consecutive_count'),
+    ('time_taken_seconds', 'moves__time_taken_seconds'),
+    ('move_created_at', 'moves__created_at'),
+)
+
+CHUNK_SIZE = 2000
+
+
+def history_rows(user, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple]:
+    """Histórico completo das partidas do usuário (todos os jogadores e jogadas).
+
+    Uma única consulta (jogadores com LEFT JOIN nas jogadas), lida por um
+    cursor no servidor em blocos: a memória não cresce com o histórico.
+    """
+    user_matches = MatchPlayer.objects.filter(user=user).values('match_id')
+    rows = MatchPlayer.objects.filter(match_id__in=user_matches).order_by(
+        'match__started_at', 'match_id', 'position', 'id', 'moves__turn_number'
+    ).values_list(*(lookup for _, lookup in EXPORT_COLUMNS))
+    return rows.iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """Buffer que apenas devolve o que recebe (csv.writer sem acumular em memória)"""
+
+    def write(self, value):
+        return value
+
+
+def export_history(user, output: str = 'ndjson', chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Gera o histórico do usuário linha a linha, em NDJSON ou CSV"""
+    columns = [name for name, _ in EXPORT_COLUMNS]
+    rows = history_rows(user, chunk_size)
+
+    if output == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow(
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in row
+            )
+        return
+
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + '\n'
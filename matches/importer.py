@@ -0,0 +1,294 @@
+import csv
+import io
+import json
+import uuid
+from collections import Counter, defaultdict
+from typing import IO, Dict, Iterable, List
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from accounts.stats import rebuild_user_stats
+from accounts.streaks import rebuild_user_streaks
+from core.tasks import schedule_match_evaluation
+from .models import Match, MatchPlayer, Move
+
+User = get_user_model()
+
+IMPORT_FORMATS = ('json', 'csv')
+
+MOVE_TYPES = {choice for choice, _ in Move.MOVE_TYPE_CHOICES}
+TEAMS = {choice for choice, _ in MatchPlayer.TEAM_CHOICES}
+STATUSES = {choice for choice, _ in Match.STATUS_CHOICES}
+
+
+class MatchImportError(ValueError):
+    """Arquivo de importação inválido; errors lista os problemas encontrados"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__('; '.join(errors[:10]))
+        self.errors = errors
+
+
+def load_matches(source: IO, input_format: str) -> List[Dict]:
+    """Lê as partidas de um arquivo JSON ou CSV (texto ou binário)"""
+    content = source.read()
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    if input_format == 'csv':
+        return parse_csv(io.StringIO(content))
+    try:
+        return parse_json(json.loads(content))
+    except json.JSONDecodeError as exc:
+        raise MatchImportError([f'JSON inválido: {exc}'])
+
+
+def parse_json(data) -> List[Dict]:
+    """Partidas no formato {"matches": [{started_at, ended_at, players: [...], moves: [...]}]}.
+
+    O turn_number das jogadas é opcional: sem ele, os turnos seguem a ordem da lista.
+    """
+    matches = data.get('matches') if isinstance(data, dict) else data
+    if not isinstance(matches, list):
+        raise MatchImportError(['O arquivo deve conter uma lista "matches"'])
+    return matches
+
+
+def parse_csv(lines: Iterable[str]) -> List[Dict]:
+    """Partidas no formato CSV da exportação (uma linha por jogada, agrupadas por match_id)"""
+    matches: Dict[str, Dict] = {}
+    seen_players = defaultdict(set)
+
+    for row in csv.DictReader(lines):
+        key = row.get('match_id') or ''
+        match = matches.setdefault(key, {
+            'started_at': row.get('started_at'),
+            'ended_at': row.get('ended_at') or None,
+            'status': row.get('match_status') or None,
+            'players': [],
+            'moves': [],
+        })
+
+        user = row.get('user_id') or row.get('username') or row.get('email')
+        if user not in seen_players[key]:
+            seen_players[key].add(user)
+            match['players'].append({
+                'user': user,
+                'team': row.get('team'),
+                'position': row.get('position'),
+                'is_winner': row.get('is_winner'),
+            })
+
+        if row.get('move_type'):
+            match['moves'].append({
+                'user': user,
+                'turn_number': row.get('turn_number') or None,
+                'move_type': row['move_type'],
+                'points': row.get('move_points') or 0,
+                'description': row.get('description') or '',
+                'is_winning_move': row.get('is_winning_move'),
+                'balls_potted': row.get('balls_potted') or 0,
+                'consecutive_count': row.get('consecutive_count') or 0,
+                'time_taken_seconds': row.get('time_taken_seconds') or None,
+            })
+
+    return list(matches.values())
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'sim', 'yes')
+    return bool(value)
+
+
+def _as_datetime(value):
+    if value in (None, ''):
+        return None
+    parsed = parse_datetime(value) if isinstance(value, str) else value
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _resolve_users(matches: List[Dict]) -> Dict[str, object]:
+    """Resolve todos os usuários citados (id, email ou username) em uma única consulta"""
+    identifiers = {
+        str(item['user'])
+        for match in matches if isinstance(match, dict)
+        for item in (match.get('players') or []) + (match.get('moves') or [])
+        if isinstance(item, dict) and item.get('user')
+    }
+    ids = []
+    for identifier in identifiers:
+        try:
+            ids.append(uuid.UUID(identifier))
+        except ValueError:
+            pass
+
+    users = {}
+    for user in User.objects.filter(Q(pk__in=ids) | Q(email__in=identifiers) | Q(username__in=identifiers)):
+        for key in (str(user.pk), user.email, user.username):
+            if key in identifiers:
+                users[key] = user
+    return users
+
+
+def _build_match(data: Dict, prefix: str, users: Dict, created_by, errors: List[str]):
+    """Monta (sem gravar) a partida, seus jogadores e jogadas; None se houver erros"""
+    started_at = _as_datetime(data.get('started_at'))
+    ended_at = _as_datetime(data.get('ended_at'))
+    status = data.get('status') or 'finalizada'
+    if started_at is None:
+        errors.append(f'{prefix}.started_at: data inválida ou ausente')
+        return None
+    if status not in STATUSES:
+        errors.append(f'{prefix}.status: valor inválido "{status}"')
+        return None
+    if status == 'finalizada' and ended_at is None:
+        ended_at = started_at
+
+    match = Match(
+        id=uuid.uuid4(),
+        created_by=created_by,
+        status=status,
+        started_at=started_at,
+        ended_at=ended_at,
+        duration_minutes=int((ended_at - started_at).total_seconds() / 60) if ended_at else None,
+    )
+    error_count = len(errors)
+
+    players = {}
+    for player_index, player_data in enumerate(data.get('players') or []):
+        user = users.get(str(player_data.get('user')))
+        team = player_data.get('team')
+        if user is None:
+            errors.append(f'{prefix}.players[{player_index}].user: usuário não encontrado')
+            continue
+        if team not in TEAMS:
+            errors.append(f'{prefix}.players[{player_index}].team: valor inválido "{team}"')
+            continue
+        if user.pk in players:
+            errors.append(f'{prefix}.players[{player_index}].user: jogador repetido')
+            continue
+        players[user.pk] = MatchPlayer(
+            id=uuid.uuid4(),
+            match=match,
+            user=user,
+            team=team,
+            position=int(player_data.get('position') or player_index),
+            is_winner=_as_bool(player_data.get('is_winner')),
+        )
+    if not players and len(errors) == error_count:
+        errors.append(f'{prefix}.players: a partida precisa de jogadores')
+
+    # Mesmo critério de sync_match_winner: o primeiro vencedor por posição (e id)
+    winners = sorted(
+        (player for player in players.values() if player.is_winner),
+        key=lambda player: (player.position, player.id.hex)
+    )
+    if winners:
+        match.winner = winners[0].user
+
+    moves = []
+    for move_index, move_data in enumerate(data.get('moves') or []):
+        user = users.get(str(move_data.get('user')))
+        player = players.get(user.pk) if user else None
+        move_type = move_data.get('move_type')
+        if player is None:
+            errors.append(f'{prefix}.moves[{move_index}].user: não é jogador da partida')
+            continue
+        if move_type not in MOVE_TYPES:
+            errors.append(f'{prefix}.moves[{move_index}].move_type: valor inválido "{move_type}"')
+            continue
+        turn_number = move_data.get('turn_number')
+        turn_number = int(turn_number) if turn_number not in (None, '') else None
+        if turn_number is not None and turn_number < 1:
+            errors.append(f'{prefix}.moves[{move_index}].turn_number: deve ser maior que zero')
+            continue
+        move = Move(
+            match=match,
+            player=player,
+            turn_number=turn_number,
+            move_type=move_type,
+            points=int(move_data.get('points') or 0),
+            description=move_data.get('description') or '',
+            is_winning_move=_as_bool(move_data.get('is_winning_move')),
+            balls_potted=int(move_data.get('balls_potted') or 0),
+            consecutive_count=int(move_data.get('consecutive_count') or 0),
+            time_taken_seconds=(
+                int(move_data['time_taken_seconds']) if move_data.get('time_taken_seconds') else None
+            ),
+        )
+        player.points += move.points
+        moves.append(move)
+
+    turns = [move.turn_number for move in moves if move.turn_number is not None]
+    if not turns:
+        # Sem turn_number no arquivo: os turnos seguem a ordem das jogadas
+        for turn_number, move in enumerate(moves, start=1):
+            move.turn_number = turn_number
+    elif len(turns) != len(moves):
+        errors.append(f'{prefix}.moves: turn_number deve ser informado em todas as jogadas ou em nenhuma')
+    else:
+        repeated = sorted(turn for turn, count in Counter(turns).items() if count > 1)
+        if repeated:
+            errors.append(f'{prefix}.moves: turn_number repetido {repeated}')
+        # A exportação ordena por jogador; a ordem da partida é a dos turnos
+        moves.sort(key=lambda move: move.turn_number)
+
+    if len(errors) > error_count:
+        return None
+    match.next_turn = moves[-1].turn_number + 1 if moves else 1
+    return match, list(players.values()), moves
+
+
+def import_matches(matches: List[Dict], created_by, batch_size: int = 1000) -> List[Match]:
+    """Importa partidas finalizadas com jogadores e jogadas em lote.
+
+    Valida tudo antes de gravar; os registros são criados com bulk_create em
+    uma única transação, com vencedor, duração e pontos calculados. Como
+    bulk_create não dispara sinais, as estatísticas e sequências dos usuários
+    envolvidos são recalculadas ao final, e as conquistas de cada partida são
+    avaliadas uma vez após o commit.
+    """
+    users = _resolve_users(matches)
+    errors = []
+    new_matches, new_players, new_moves = [], [], []
+
+    for index, data in enumerate(matches):
+        prefix = f'matches[{index}]'
+        try:
+            built = _build_match(data, prefix, users, created_by, errors)
+        except (AttributeError, TypeError, ValueError) as exc:
+            errors.append(f'{prefix}: dados inválidos ({exc})')
+            continue
+        if built is not None:
+            match, players, moves = built
+            new_matches.append(match)
+            new_players.extend(players)
+            new_moves.extend(moves)
+
+    if errors:
+        raise MatchImportError(errors)
+
+    started_at_values = [match.started_at for match in new_matches]
+    with transaction.atomic():
+        Match.objects.bulk_create(new_matches, batch_size=batch_size)
+        # started_at é auto_now_add (sobrescrito no bulk_create): regrava as datas originais
+        for match, started_at in zip(new_matches, started_at_values):
+            match.started_at = started_at
+        Match.objects.bulk_update(new_matches, ['started_at'], batch_size=batch_size)
+
+        MatchPlayer.objects.bulk_create(new_players, batch_size=batch_size)
+        Move.objects.bulk_create(new_moves, batch_size=batch_size)
+
+        affected = {player.user_id for player in new_players}
+        rebuild_user_stats(affected)
+        rebuild_user_streaks(affected)
+
+        for match in new_matches:
+            if match.status == 'finalizada':
+                schedule_match_evaluation(match)
+
+    return new_matches
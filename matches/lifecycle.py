@@ -0,0 +1,25 @@
+from django.utils import timezone
+from accounts.stats import record_match_finished
+from core.tasks import schedule_match_evaluation
+from .models import Match
+
+
+def complete_match(match: Match) -> None:
+    """Finaliza a partida e aplica os efeitos do fim dela.
+
+    Grava status, término e duração (se ainda não informados), recalcula o
+    vencedor, avança as sequências e a última partida dos jogadores e agenda
+    a avaliação das conquistas após o commit. Deve ser chamada dentro da
+    transação que finaliza a partida, depois de gravados os jogadores.
+    """
+    match.status = 'finalizada'
+    match.ended_at = match.ended_at or timezone.now()
+    if match.duration_minutes is None and match.started_at:
+        match.duration_minutes = int((match.ended_at - match.started_at).total_seconds() / 60)
+    
+    match.save()
+    match.sync_winner()
+    record_match_finished(match)
+    
+    # Avalia conquistas em segundo plano (novos desbloqueios em /api/achievements/unlocks/)
+    schedule_match_evaluation(match)
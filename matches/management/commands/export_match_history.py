@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from matches.management.users import get_user
+from matches.export import CHUNK_SIZE, EXPORT_FORMATS, export_history
+
+
+class Command(BaseCommand):
+    help = 'Exporta todo o histórico de partidas de um usuário (partidas, jogadores e jogadas) em NDJSON ou CSV'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('user', help='Email, username ou id do usuário')
+        parser.add_argument('--output', choices=EXPORT_FORMATS, default='ndjson')
+        parser.add_argument('--file', help='Arquivo de destino (padrão: saída padrão)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Linhas lidas por vez do banco')
+    
+    def handle(self, *args, **options):
+        user = get_user(options['user'])
+        lines = export_history(user, options['output'], options['chunk_size'])
+        
+        if options['file']:
+            with open(options['file'], 'w', newline='', encoding='utf-8') as destination:
+                destination.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
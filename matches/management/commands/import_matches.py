@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from matches.management.users import get_user
+from matches.importer import IMPORT_FORMATS, MatchImportError, import_matches, load_matches
+
+
+class Command(BaseCommand):
+    help = 'Importa partidas finalizadas (jogadores e jogadas) de um arquivo JSON ou CSV'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Arquivo JSON ({"matches": [...]}) ou CSV no formato da exportação')
+        parser.add_argument('--created-by', required=True, help='Email, username ou id do organizador')
+        parser.add_argument('--input', choices=IMPORT_FORMATS, help='Formato do arquivo (padrão: pela extensão)')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Registros por INSERT')
+    
+    def handle(self, *args, **options):
+        created_by = get_user(options['created_by'])
+        input_format = options['input'] or ('csv' if options['file'].lower().endswith('.csv') else 'json')
+        
+        try:
+            with open(options['file'], encoding='utf-8-sig', newline='') as source:
+                data = load_matches(source, input_format)
+            matches = import_matches(data, created_by, batch_size=options['batch_size'])
+        except OSError as exc:
+            raise CommandError(f'Não foi possível ler o arquivo: {exc}')
+        except MatchImportError as exc:
+            for error in exc.errors:
+                self.stderr.write(error)
+            raise CommandError(f'Importação cancelada: {len(exc.errors)} erro(s)')
+        
+        self.stdout.write(self.style.SUCCESS(f'{len(matches)} partidas importadas'))
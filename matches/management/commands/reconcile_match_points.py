@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from matches.scoring import reconcile_points
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os pontos dos jogadores a partir da soma das jogadas e corrige divergências'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('match_ids', nargs='*', help='Ids das partidas (padrão: todas)')
+    
+    def handle(self, *args, **options):
+        fixed = reconcile_points(options['match_ids'] or None)
+        self.stdout.write(self.style.SUCCESS(f'{fixed} jogador(es) com pontos corrigidos.'))
@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import CommandError
+
+User = get_user_model()
+
+
+def get_user(identifier: str):
+    """Usuário pelo email, username ou id informado na linha de comando"""
+    lookups = [{'email': identifier}, {'username': identifier}]
+    for lookup in lookups:
+        user = User.objects.filter(**lookup).first()
+        if user:
+            return user
+    try:
+        return User.objects.get(pk=identifier)
+    except (User.DoesNotExist, ValidationError):
+        raise CommandError(f'Usuário não encontrado: {identifier}')
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:50
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def renumber_turns(apps, schema_editor):
+    Match = apps.get_model('matches', 'Match')
+    Move = apps.get_model('matches', 'Move')
+
+    # Partidas com turnos repetidos (escritas concorrentes) são renumeradas em ordem
+    duplicated = Move.objects.order_by().values('match_id', 'turn_number').annotate(
+        total=Count('id')
+    ).filter(total__gt=1).values_list('match_id', flat=True).distinct()
+
+    for match_id in set(duplicated):
+        moves = list(Move.objects.filter(match_id=match_id).order_by('turn_number', 'created_at', 'id'))
+        for turn_number, move in enumerate(moves, start=1):
+            move.turn_number = turn_number
+        Move.objects.bulk_update(moves, ['turn_number'], batch_size=1000)
+
+    last_turn = Move.objects.filter(match_id=OuterRef('pk')).values('match_id').annotate(
+        last=Max('turn_number')
+    ).values('last')
+    Match.objects.update(next_turn=Coalesce(Subquery(last_turn), 0) + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='next_turn',
+            field=models.PositiveIntegerField(default=1, help_text='Próximo número de turno a ser atribuído'),
+        ),
+        migrations.RunPython(renumber_turns, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='move',
+            constraint=models.UniqueConstraint(fields=('match', 'turn_number'), name='unique_move_turn_per_match'),
+        ),
+    ]
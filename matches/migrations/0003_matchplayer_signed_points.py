@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0002_match_next_turn'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='matchplayer',
+            name='points',
+            field=models.IntegerField(default=0, help_text='Pontos do jogador na partida'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_winner(apps, schema_editor):
+    Match = apps.get_model('matches', 'Match')
+    MatchPlayer = apps.get_model('matches', 'MatchPlayer')
+
+    winner = MatchPlayer.objects.filter(
+        match_id=OuterRef('pk'),
+        is_winner=True
+    ).order_by('position').values('user_id')[:1]
+    Match.objects.filter(match_players__is_winner=True).update(winner=Subquery(winner))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0003_matchplayer_signed_points'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='winner',
+            field=models.ForeignKey(blank=True, help_text='Vencedor da partida (desnormalizado a partir de MatchPlayer.is_winner)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='won_matches', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_winner, migrations.RunPython.noop),
+    ]
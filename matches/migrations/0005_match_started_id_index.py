@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:56
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0004_match_winner'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['-started_at', '-id'], name='matches_started_id_idx'),
+        ),
+    ]
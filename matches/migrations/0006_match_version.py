@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-17 01:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0005_match_started_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='version',
+            field=models.PositiveIntegerField(default=1, help_text='Incrementada a cada alteração de jogadas, placar ou resultado'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-17 02:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('matches', '0006_match_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['status', '-started_at'], name='matches_status_started_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchplayer',
+            index=models.Index(fields=['user', 'is_winner'], name='match_players_user_win_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='move',
+            index=models.Index(fields=['match', 'player', 'move_type'], name='moves_match_player_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='move',
+            index=models.Index(fields=['player', 'move_type'], name='moves_player_type_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, OuterRef, Subquery
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 
@@ -21,27 +22,71 @@ class Match(models.Model):
     started_at = models.DateTimeField(auto_now_add=True)
     ended_at = models.DateTimeField(null=True, blank=True)
     duration_minutes = models.PositiveIntegerField(null=True, blank=True, help_text="Duração da partida em minutos")
+    next_turn = models.PositiveIntegerField(default=1, help_text="Próximo número de turno a ser atribuído")
+    version = models.PositiveIntegerField(default=1, help_text="Incrementada a cada alteração de jogadas, placar ou resultado")
+    winner = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='won_matches',
+        help_text="Vencedor da partida (desnormalizado a partir de MatchPlayer.is_winner)"
+    )
     
     class Meta:
         db_table = 'matches'
         verbose_name = 'Partida'
         verbose_name_plural = 'Partidas'
         ordering = ['-started_at']
+        indexes = [
+            # Listagens e paginação por cursor sobre (started_at, id)
+            models.Index(fields=['-started_at', '-id'], name='matches_started_id_idx'),
+            # Filtro por status (listagens, ?status=) já na ordem das listagens
+            models.Index(fields=['status', '-started_at'], name='matches_status_started_idx'),
+        ]
     
     def __str__(self):
         return f"Partida {self.id} - {self.status}"
     
-    @property
-    def winner(self):
-        """Retorna o jogador vencedor da partida"""
-        winner_player = self.match_players.filter(is_winner=True).first()
-        return winner_player.user if winner_player else None
+    # Mantidos por UPDATEs atômicos (allocate_turns, sync_match_winner): save() não os regrava
+    DERIVED_FIELDS = ('next_turn', 'version', 'winner')
+    
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        super().save(*args, **kwargs)
     
     @property
     def total_moves(self):
         """Retorna o total de jogadas da partida"""
         return self.moves.count()
     
+    def sync_winner(self) -> None:
+        """Recalcula o vencedor a partir dos jogadores, com um único UPDATE"""
+        sync_match_winner(self.pk)
+        self.winner_id, self.version = Match.objects.filter(pk=self.pk).values_list('winner_id', 'version').get()
+    
+    def bump_version(self) -> None:
+        """Incrementa a versão (invalida o ETag do placar) com um UPDATE atômico"""
+        bump_match_versions([self.pk])
+        self.version = Match.objects.filter(pk=self.pk).values_list('version', flat=True).get()
+    
+    def allocate_turns(self, count: int = 1) -> int:
+        """Reserva um bloco contíguo de turnos e retorna o primeiro.
+
+        O UPDATE com F() trava a linha da partida até o fim da transação, então
+        escritores concorrentes recebem blocos distintos; em caso de rollback o
+        contador volta junto, sem buracos na numeração.
+        """
+        with transaction.atomic():
+            Match.objects.filter(pk=self.pk).update(
+                next_turn=F('next_turn') + count,
+                version=F('version') + 1
+            )
+            next_turn, version = Match.objects.filter(pk=self.pk).values_list('next_turn', 'version').get()
+        self.next_turn = next_turn
+        self.version = version
+        return next_turn - count
+    
     def clean(self):
         if self.status == 'finalizada' and not self.ended_at:
             raise ValidationError('Partida finalizada deve ter data de término.')
@@ -61,7 +106,8 @@ class MatchPlayer(models.Model):
     team = models.CharField(max_length=1, choices=TEAM_CHOICES)
     is_winner = models.BooleanField(default=False)
     position = models.PositiveIntegerField(help_text="Ordem de jogada")
-    points = models.PositiveIntegerField(default=0, help_text="Pontos do jogador na partida")
+    # Soma dos pontos das jogadas; pode ficar negativa com faltas e pontos contra
+    points = models.IntegerField(default=0, help_text="Pontos do jogador na partida")
     
     class Meta:
         db_table = 'match_players'
@@ -69,9 +115,21 @@ class MatchPlayer(models.Model):
         verbose_name_plural = 'Jogadores da Partida'
         unique_together = ['match', 'user']
         ordering = ['position']
+        indexes = [
+            # Participações/vitórias de um usuário (estatísticas, sequências, histórico)
+            models.Index(fields=['user', 'is_winner'], name='match_players_user_win_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.display_name} - {self.match.id}"
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda os valores originais para calcular a variação das estatísticas do usuário
+        if 'is_winner' in field_names and 'points' in field_names:
+            instance._loaded_stats = (instance.is_winner, instance.points)
+        return instance
 
 
 class Move(models.Model):
@@ -109,6 +167,30 @@ class Move(models.Model):
         verbose_name = 'Jogada'
         verbose_name_plural = 'Jogadas'
         ordering = ['turn_number', 'created_at']
+        constraints = [
+            # Também serve de índice para (match, turn_number): replay e jogadas novas (?after_turn)
+            models.UniqueConstraint(fields=['match', 'turn_number'], name='unique_move_turn_per_match'),
+        ]
+        indexes = [
+            # Contagem de jogadas por jogador e tipo nas partidas avaliadas (regras declarativas)
+            models.Index(fields=['match', 'player', 'move_type'], name='moves_match_player_type_idx'),
+            # Contagem de jogadas de carreira por tipo (progresso, estatísticas)
+            models.Index(fields=['player', 'move_type'], name='moves_player_type_idx'),
+        ]
     
     def __str__(self):
-        return f"Jogada {self.turn_number} - {self.player.user.display_name} - {self.move_type}"
\ No newline at end of file
+        return f"Jogada {self.turn_number} - {self.player.user.display_name} - {self.move_type}"
+
+
+def sync_match_winner(match_id) -> None:
+    """Grava em Match.winner o usuário do primeiro jogador vencedor (por posição e id) e incrementa a versão"""
+    winner = MatchPlayer.objects.filter(
+        match_id=OuterRef('pk'),
+        is_winner=True
+    ).order_by('position', 'id').values('user_id')[:1]
+    Match.objects.filter(pk=match_id).update(winner=Subquery(winner), version=F('version') + 1)
+
+
+def bump_match_versions(match_ids) -> None:
+    """Incrementa a versão das partidas (placar ou resultado alterado fora das jogadas)"""
+    Match.objects.filter(pk__in=match_ids).update(version=F('version') + 1)
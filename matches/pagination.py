@@ -0,0 +1,122 @@
+import uuid
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class MatchCursorPagination(CursorPagination):
+    """Paginação por cursor sobre (started_at, id): páginas profundas custam o mesmo que a primeira.
+
+    O CursorPagination do DRF guarda no cursor só o primeiro campo da ordenação
+    e resolve empates com um deslocamento, que pula ou repete partidas com o
+    mesmo started_at (importações em lote) quando a lista muda entre as
+    páginas. Aqui a posição é o par (started_at, id), único por partida, e o
+    filtro compara o par inteiro.
+    """
+    ordering = ('-started_at', '-id')
+
+    def _get_position_from_instance(self, instance, ordering):
+        return f'{instance.started_at.isoformat()}|{instance.pk}'
+
+    def _parse_position(self, position: str):
+        started_at, _, pk = position.partition('|')
+        try:
+            started_at, pk = parse_datetime(started_at), uuid.UUID(pk)
+        except ValueError:
+            started_at = None
+        if started_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return started_at, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*(
+                field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering
+            ))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        # Partidas depois de (started_at, id) na direção da página
+        if current_position is not None:
+            started_at, pk = self._parse_position(current_position)
+            lookup = 'lt' if reverse != self.ordering[0].startswith('-') else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'started_at__{lookup}': started_at})
+                | Q(started_at=started_at, **{f'id__{lookup}': pk})
+            )
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        # Posição do item seguinte à página
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+class MatchPagination(PageNumberPagination):
+    """Paginação por página (padrão) ou por cursor, quando o cliente a solicita.
+
+    O modo cursor é ativado com ?pagination=cursor e mantido pelos links
+    next/previous (que carregam o parâmetro cursor).
+    """
+    cursor_class = MatchCursorPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def uses_cursor(self, request) -> bool:
+        return (
+            request.query_params.get('pagination') == 'cursor'
+            or self.cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.uses_cursor(request):
+            self.cursor_paginator = self.cursor_class()
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
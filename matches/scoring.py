@@ -0,0 +1,55 @@
+from typing import Iterable
+from django.db.models import F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from accounts.stats import apply_stats_delta, rebuild_user_stats
+from .models import MatchPlayer, Move, bump_match_versions
+
+
+def add_points(player: MatchPlayer, delta: int) -> int:
+    """Soma pontos ao jogador com um UPDATE atômico (F), gravando apenas a coluna de pontos.
+
+    Pontos negativos (faltas, pontos contra) são aceitos: o placar do jogador é
+    sempre a soma das suas jogadas. update() não dispara sinais, então as
+    estatísticas do usuário são atualizadas explicitamente. Retorna o novo total.
+    """
+    if not delta:
+        return player.points
+
+    MatchPlayer.objects.filter(pk=player.pk).update(points=F('points') + delta)
+    apply_stats_delta(player.user_id, total_points=delta)
+
+    points = MatchPlayer.objects.filter(pk=player.pk).values_list('points', flat=True).get()
+    player.points = points
+    # Mantém a referência usada pelo sinal de save() (ver MatchPlayer.from_db)
+    loaded = getattr(player, '_loaded_stats', None)
+    if loaded is not None:
+        player._loaded_stats = (loaded[0], points)
+    return points
+
+
+def reconcile_points(match_ids: Iterable = None) -> int:
+    """Recalcula os pontos dos jogadores a partir da soma das jogadas.
+
+    Corrige apenas as linhas divergentes, incrementa a versão das partidas
+    afetadas e recalcula as estatísticas dos usuários. Retorna a quantidade
+    de jogadores corrigidos.
+    """
+    move_sums = Move.objects.filter(player_id=OuterRef('pk')).order_by().values('player_id').annotate(
+        total=Sum('points')
+    ).values('total')
+
+    players = MatchPlayer.objects.annotate(
+        expected=Coalesce(Subquery(move_sums, output_field=IntegerField()), Value(0))
+    ).exclude(points=F('expected'))
+    if match_ids is not None:
+        players = players.filter(match_id__in=list(match_ids))
+
+    divergent = list(players.values_list('pk', 'match_id', 'user_id', 'expected'))
+    for player_id, _, _, expected in divergent:
+        MatchPlayer.objects.filter(pk=player_id).update(points=expected)
+
+    if divergent:
+        # Placar alterado: clientes com o ETag antigo precisam recarregar
+        bump_match_versions({match_id for _, match_id, _, _ in divergent})
+        rebuild_user_stats({user_id for _, _, user_id, _ in divergent})
+    return len(divergent)
@@ -1,7 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Prefetch
+from .lifecycle import complete_match
 from .models import Match, MatchPlayer, Move
-from accounts.serializers import UserProfileSerializer
+from .scoring import add_points
+from accounts.serializers import UserProfileSerializer, UserStatsBatchMixin, UserStatsListSerializer
+from accounts.stats import apply_stats_delta, invalidate_match_stats
 
 User = get_user_model()
 
@@ -33,7 +38,7 @@ class MatchPlayerSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'points')
 
 
-class MatchSerializer(serializers.ModelSerializer):
+class MatchSerializer(UserStatsBatchMixin, serializers.ModelSerializer):
     created_by = UserProfileSerializer(read_only=True)
     match_players = MatchPlayerSerializer(many=True)
     moves = MoveSerializer(many=True, read_only=True)
@@ -47,7 +52,26 @@ class MatchSerializer(serializers.ModelSerializer):
             'duration_minutes', 'match_players', 'moves', 'winner', 'total_moves'
         )
         read_only_fields = ('id', 'created_by', 'started_at')
+        list_serializer_class = UserStatsListSerializer
     
+    @staticmethod
+    def setup_queryset(queryset):
+        """Carrega tudo o que o serializer lê em um número fixo de consultas"""
+        moves = Move.objects.select_related('player__user')
+        return queryset.select_related('created_by__stats', 'winner__stats').prefetch_related(
+            Prefetch('match_players', queryset=MatchPlayer.objects.select_related('user__stats')),
+            Prefetch('match_players__moves', queryset=moves),
+            Prefetch('moves', queryset=moves),
+        )
+    
+    def serialized_users(self, instance):
+        users = [instance.created_by, instance.winner]
+        # Jogadores apenas se já carregados (setup_queryset); senão seriam lidos duas vezes
+        if 'match_players' in getattr(instance, '_prefetched_objects_cache', {}):
+            users.extend(player.user for player in instance.match_players.all())
+        return users
+    
+    @transaction.atomic
     def create(self, validated_data):
         match_players_data = validated_data.pop('match_players')
         match = Match.objects.create(
@@ -60,13 +84,17 @@ class MatchSerializer(serializers.ModelSerializer):
         
         return match
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         match_players_data = validated_data.pop('match_players', [])
+        finishing = instance.status != 'finalizada' and validated_data.get('status') == 'finalizada'
         
         # Atualiza os dados da partida
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
+        # save() não grava a versão (campo derivado): incrementada à parte
+        instance.bump_version()
         
         # Atualiza os jogadores se fornecido
         if match_players_data:
@@ -82,10 +110,17 @@ class MatchSerializer(serializers.ModelSerializer):
                     except MatchPlayer.DoesNotExist:
                         pass
         
+        # Finalizada pela edição: mesmos efeitos de finish_match (com os vencedores já gravados)
+        if finishing:
+            complete_match(instance)
+        
+        # Status e duração entram nas estatísticas de partidas dos jogadores (descartadas após o commit)
+        invalidate_match_stats(*instance.match_players.values_list('user_id', flat=True))
+        
         return instance
 
 
-class MatchListSerializer(serializers.ModelSerializer):
+class MatchListSerializer(UserStatsBatchMixin, serializers.ModelSerializer):
     created_by = UserProfileSerializer(read_only=True)
     winner = UserProfileSerializer(read_only=True)
     players_count = serializers.SerializerMethodField()
@@ -96,6 +131,15 @@ class MatchListSerializer(serializers.ModelSerializer):
             'id', 'created_by', 'status', 'started_at', 'ended_at',
             'duration_minutes', 'winner', 'players_count'
         )
+        list_serializer_class = UserStatsListSerializer
+    
+    @staticmethod
+    def setup_queryset(queryset):
+        """Criador, vencedor e contagem de jogadores de todas as linhas em três consultas"""
+        return queryset.select_related('created_by__stats', 'winner__stats').prefetch_related('match_players')
+    
+    def serialized_users(self, instance):
+        return [instance.created_by, instance.winner]
     
     def get_players_count(self, obj):
         return obj.match_players.count()
@@ -109,28 +153,87 @@ class CreateMoveSerializer(serializers.ModelSerializer):
             'consecutive_count', 'time_taken_seconds'
         )
     
+    @transaction.atomic
     def create(self, validated_data):
         match = self.context['match']
         player = self.context['player']
         
-        # Calcula o número do turno
-        last_move = Move.objects.filter(match=match).order_by('-turn_number').first()
-        turn_number = (last_move.turn_number + 1) if last_move else 1
-        
         move = Move.objects.create(
             match=match,
             player=player,
-            turn_number=turn_number,
+            turn_number=match.allocate_turns(),
             **validated_data
         )
         
-        # Atualiza pontos do jogador
-        player.points += validated_data.get('points', 0)
-        player.save()
+        # Atualiza pontos do jogador (UPDATE atômico, sem sobrescrever as demais colunas)
+        add_points(player, validated_data.get('points', 0))
         
         return move
 
 
+class BulkMoveItemSerializer(CreateMoveSerializer):
+    user_id = serializers.UUIDField(required=False, help_text="Jogador da jogada (padrão: quem envia)")
+    
+    class Meta(CreateMoveSerializer.Meta):
+        fields = CreateMoveSerializer.Meta.fields + ('user_id',)
+
+
+class BulkCreateMovesSerializer(serializers.Serializer):
+    """Lote ordenado de jogadas de uma partida, gravado de uma só vez"""
+    
+    MAX_MOVES = 200
+    
+    moves = BulkMoveItemSerializer(many=True, allow_empty=False, max_length=MAX_MOVES)
+    
+    def validate_moves(self, moves):
+        players = self.context['players']
+        default_user_id = self.context['request'].user.pk
+        # Só o criador da partida (placar da mesa) registra jogadas de outros jogadores
+        is_creator = default_user_id == self.context['match'].created_by_id
+        
+        errors = []
+        for item in moves:
+            user_id = item.pop('user_id', default_user_id)
+            player = players.get(user_id)
+            if user_id != default_user_id and not is_creator:
+                errors.append({'user_id': ['Apenas o criador da partida pode registrar jogadas de outros jogadores.']})
+            elif player is None:
+                errors.append({'user_id': ['Usuário não é participante desta partida.']})
+            else:
+                errors.append({})
+                item['player'] = player
+        
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return moves
+    
+    @transaction.atomic
+    def create(self, validated_data):
+        match = self.context['match']
+        moves_data = validated_data['moves']
+        
+        # Bloco contíguo de turnos reservado de uma vez
+        first_turn = match.allocate_turns(len(moves_data))
+        
+        moves = Move.objects.bulk_create([
+            Move(match=match, turn_number=first_turn + index, **item)
+            for index, item in enumerate(moves_data)
+        ])
+        
+        # Um único update de pontos por jogador; bulk_create e update() não disparam
+        # sinais, então as estatísticas dos usuários são atualizadas explicitamente
+        deltas = {}
+        for move in moves:
+            points, count = deltas.get(move.player, (0, 0))
+            deltas[move.player] = (points + move.points, count + 1)
+        
+        for player, (points, count) in deltas.items():
+            add_points(player, points)
+            apply_stats_delta(player.user_id, total_moves=count)
+        
+        return moves
+
+
 class MatchStatsSerializer(serializers.Serializer):
     total_matches = serializers.IntegerField()
     wins = serializers.IntegerField()
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import MatchPlayer, sync_match_winner
+
+
+@receiver(post_save, sender=MatchPlayer)
+def match_player_saved(sender, instance, created, **kwargs):
+    """Mantém Match.winner em dia quando o vencedor muda"""
+    # Um jogador novo que não venceu não altera o vencedor
+    if instance.is_winner or not created:
+        sync_match_winner(instance.match_id)
+
+
+@receiver(post_delete, sender=MatchPlayer)
+def match_player_deleted(sender, instance, **kwargs):
+    if instance.is_winner:
+        sync_match_winner(instance.match_id)
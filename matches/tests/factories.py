@@ -0,0 +1,31 @@
+import factory
+from accounts.tests.factories import UserFactory
+from matches.models import Match, MatchPlayer, Move
+
+
+class MatchFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Match
+
+    created_by = factory.SubFactory(UserFactory)
+
+
+class MatchPlayerFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = MatchPlayer
+
+    match = factory.SubFactory(MatchFactory)
+    user = factory.SubFactory(UserFactory)
+    team = 'A'
+    position = factory.Sequence(lambda n: n)
+
+
+class MoveFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Move
+
+    match = factory.LazyAttribute(lambda move: move.player.match)
+    player = factory.SubFactory(MatchPlayerFactory)
+    turn_number = factory.LazyAttribute(lambda move: move.match.allocate_turns())
+    move_type = 'normal'
+    points = 1
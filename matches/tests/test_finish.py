@@ -0,0 +1,40 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.models import UserStats
+from matches.models import Match
+from .factories import MatchPlayerFactory
+
+
+@pytest.fixture
+def player():
+    return MatchPlayerFactory(is_winner=True)
+
+
+def finish_through(player, name, method, data=None):
+    match = player.match
+    client = APIClient()
+    client.force_authenticate(match.created_by)
+    if name == 'matches:match_detail':
+        url = reverse(name, kwargs={'pk': match.pk})
+    else:
+        url = reverse(name, kwargs={'match_id': match.pk})
+    return getattr(client, method)(url, data or {}, format='json')
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('name, method, data', [
+    ('matches:finish_match', 'post', None),
+    ('matches:match_detail', 'patch', {'status': 'finalizada'}),
+])
+def test_finishing_records_streaks_and_last_played(player, name, method, data):
+    response = finish_through(player, name, method, data)
+
+    assert response.status_code == 200
+    match = Match.objects.get(pk=player.match_id)
+    assert (match.status, match.winner_id) == ('finalizada', player.user_id)
+    assert match.ended_at is not None and match.duration_minutes is not None
+    stats = UserStats.objects.get(user=player.user)
+    assert stats.last_played_at == match.ended_at
+    assert (stats.day_streak, stats.win_streak) == (1, 1)
+    assert stats.last_streak_match_started_at == match.started_at
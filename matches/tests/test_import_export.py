@@ -0,0 +1,94 @@
+import io
+import pytest
+from accounts.tests.factories import UserFactory
+from matches.export import export_history
+from matches.importer import MatchImportError, import_matches, load_matches
+from matches.models import Match, Move
+from .factories import MatchFactory, MatchPlayerFactory, MoveFactory
+
+
+def move_sequence(match):
+    return list(
+        Move.objects.filter(match=match).order_by('turn_number').values_list(
+            'turn_number', 'player__user_id', 'move_type', 'points', 'description'
+        )
+    )
+
+
+@pytest.mark.django_db
+def test_csv_round_trip_keeps_turn_order_and_descriptions():
+    user, opponent = UserFactory(), UserFactory()
+    match = MatchFactory(created_by=user)
+    player = MatchPlayerFactory(match=match, user=user, team='A', position=0, is_winner=True)
+    other = MatchPlayerFactory(match=match, user=opponent, team='B', position=1)
+    # Jogadas intercaladas: a exportação as agrupa por jogador
+    for move_player, move_type, points, description in [
+        (player, 'normal', 1, ''), (other, 'falta', -1, 'bola branca caiu'),
+        (player, 'combo', 2, 'duas de uma vez'), (other, 'normal', 1, ''), (player, 'mata_8', 1, ''),
+    ]:
+        MoveFactory(player=move_player, move_type=move_type, points=points, description=description)
+    match.status = 'finalizada'
+    match.save()
+
+    exported = ''.join(export_history(user, 'csv'))
+    imported, = import_matches(load_matches(io.StringIO(exported), 'csv'), created_by=user)
+
+    assert move_sequence(imported) == move_sequence(match)
+    assert Match.objects.get(pk=imported.pk).next_turn == 6
+
+
+@pytest.mark.django_db
+def test_import_without_turn_numbers_follows_file_order():
+    user, opponent = UserFactory(), UserFactory()
+    data = [{
+        'started_at': '2025-01-10T20:00:00-03:00',
+        'players': [{'user': user.email, 'team': 'A'}, {'user': opponent.email, 'team': 'B'}],
+        'moves': [
+            {'user': opponent.email, 'move_type': 'normal', 'points': 1},
+            {'user': user.email, 'move_type': 'snooker', 'points': 0},
+        ],
+    }]
+
+    imported, = import_matches(data, created_by=user)
+
+    assert [(turn, user_id) for turn, user_id, *_ in move_sequence(imported)] == [(1, opponent.pk), (2, user.pk)]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('turns, error', [
+    ([1, 1], 'turn_number repetido [1]'),
+    ([1, None], 'turn_number deve ser informado em todas as jogadas ou em nenhuma'),
+])
+def test_import_rejects_inconsistent_turn_numbers(turns, error):
+    user = UserFactory()
+    data = [{
+        'started_at': '2025-01-10T20:00:00-03:00',
+        'players': [{'user': user.email, 'team': 'A'}],
+        'moves': [{'user': user.email, 'move_type': 'normal', 'turn_number': turn} for turn in turns],
+    }]
+
+    with pytest.raises(MatchImportError) as excinfo:
+        import_matches(data, created_by=user)
+
+    assert excinfo.value.errors == [f'matches[0].moves: {error}']
+    assert not Match.objects.exists()
+
+
+@pytest.mark.django_db
+def test_import_picks_winner_by_position_like_sync_match_winner():
+    first, second, loser = UserFactory(), UserFactory(), UserFactory()
+    data = [{
+        'started_at': '2025-01-10T20:00:00-03:00',
+        # Fora de ordem: o primeiro vencedor do arquivo não é o de menor posição
+        'players': [
+            {'user': second.email, 'team': 'A', 'position': 2, 'is_winner': True},
+            {'user': first.email, 'team': 'A', 'position': 1, 'is_winner': True},
+            {'user': loser.email, 'team': 'B', 'position': 3},
+        ],
+    }]
+
+    imported, = import_matches(data, created_by=first)
+
+    assert Match.objects.get(pk=imported.pk).winner_id == first.pk
+    imported.sync_winner()
+    assert imported.winner_id == first.pk
@@ -0,0 +1,26 @@
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from .factories import MatchPlayerFactory
+
+
+@pytest.mark.django_db(transaction=True)
+def test_match_update_refreshes_cached_stats():
+    player = MatchPlayerFactory(is_winner=True)
+    match = player.match
+    match.status = 'finalizada'
+    match.ended_at = timezone.now()
+    match.duration_minutes = 10
+    match.save()
+    client = APIClient()
+    client.force_authenticate(player.user)
+    stats_url = reverse('matches:match_stats')
+    assert client.get(stats_url).data['longest_match_duration'] == 10
+
+    response = client.patch(
+        reverse('matches:match_detail', kwargs={'pk': match.pk}), {'duration_minutes': 42}, format='json'
+    )
+
+    assert response.status_code == 200
+    assert client.get(stats_url).data['longest_match_duration'] == 42
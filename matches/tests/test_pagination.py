@@ -0,0 +1,76 @@
+import uuid
+from datetime import timedelta
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.tests.factories import UserFactory
+from matches.models import Match
+from .factories import MatchFactory, MatchPlayerFactory
+
+URL = reverse('matches:match_list_create') + '?pagination=cursor'
+
+
+def page_ids(response):
+    assert response.status_code == 200
+    return [match['id'] for match in response.data['results']]
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def api(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def started_at(user):
+    """45 partidas do usuário, 40 com o mesmo início (importação em lote) e 5 mais antigas"""
+    for _ in range(45):
+        MatchPlayerFactory(match=MatchFactory(created_by=user), user=user)
+    started_at = timezone.now() - timedelta(days=1)
+    Match.objects.update(started_at=started_at)
+    Match.objects.filter(pk__in=list(Match.objects.values_list('pk', flat=True)[:5])).update(
+        started_at=started_at - timedelta(hours=1)
+    )
+    return started_at
+
+
+def expected_ids():
+    return [str(pk) for pk in Match.objects.order_by('-started_at', '-id').values_list('pk', flat=True)]
+
+
+@pytest.mark.django_db
+def test_cursor_pages_cover_equal_started_at_in_both_directions(api, started_at):
+    pages, url = [], URL
+    while url:
+        response = api.get(url)
+        pages.append(page_ids(response))
+        url = response.data['next']
+    assert [match_id for page in pages for match_id in page] == expected_ids()
+
+    # De volta, da última página até a primeira
+    backward, url = [pages[-1]], response.data['previous']
+    while url:
+        response = api.get(url)
+        backward.insert(0, page_ids(response))
+        url = response.data['previous']
+    assert backward == pages
+
+
+@pytest.mark.django_db
+def test_match_created_with_same_started_at_does_not_shift_next_page(api, user, started_at):
+    first = api.get(URL)
+    before = expected_ids()
+
+    # Nova partida empatada que ordena antes de toda a primeira página
+    match = MatchFactory(id=uuid.UUID(int=2 ** 128 - 1), created_by=user)
+    Match.objects.filter(pk=match.pk).update(started_at=started_at)
+    second = api.get(first.data['next'])
+
+    assert page_ids(first) + page_ids(second) == before[:40]
@@ -0,0 +1,76 @@
+import pytest
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.tests.factories import UserFactory
+from .factories import MatchFactory, MatchPlayerFactory, MoveFactory
+
+# Consultas das leituras de partidas; independem do número de jogadas e de partidas
+MATCH_DETAIL_QUERIES = 4  # partida (criador, vencedor e estatísticas), jogadores, jogadas por jogador, jogadas
+MATCH_LIST_QUERIES = 3  # contagem, página (criador, vencedor e estatísticas), jogadores
+MATCH_HISTORY_QUERIES = 3
+
+
+def finished_match(created_by, winner, loser, moves=3):
+    match = MatchFactory(created_by=created_by)
+    player = MatchPlayerFactory(match=match, user=winner, team='A', position=0, is_winner=True)
+    other = MatchPlayerFactory(match=match, user=loser, team='B', position=1)
+    for index in range(moves):
+        MoveFactory(match=match, player=other if index % 2 else player)
+    match.status = 'finalizada'
+    match.save()
+    match.sync_winner()
+    return match
+
+
+@pytest.fixture
+def user():
+    return UserFactory()
+
+
+@pytest.fixture
+def api(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('moves', [3, 40])
+def test_match_detail_query_count_does_not_grow_with_moves(api, user, moves, django_assert_num_queries):
+    match = finished_match(user, UserFactory(), user, moves=moves)
+
+    with django_assert_num_queries(MATCH_DETAIL_QUERIES):
+        response = api.get(reverse('matches:match_detail', kwargs={'pk': match.pk}))
+
+    assert response.status_code == 200
+    assert len(response.data['moves']) == moves
+    assert all(player['user']['total_matches'] == 1 for player in response.data['match_players'])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('matches', [1, 15])
+def test_match_list_query_count_does_not_grow_with_matches(api, user, matches, django_assert_num_queries):
+    # Criadores e vencedores diferentes em cada partida
+    for _ in range(matches):
+        opponent = UserFactory()
+        finished_match(opponent, opponent, user)
+
+    with django_assert_num_queries(MATCH_LIST_QUERIES):
+        response = api.get(reverse('matches:match_list_create'))
+
+    assert response.status_code == 200
+    assert len(response.data['results']) == matches
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('matches', [1, 15])
+def test_match_history_query_count_does_not_grow_with_matches(api, user, matches, django_assert_num_queries):
+    for _ in range(matches):
+        opponent = UserFactory()
+        finished_match(opponent, opponent, user)
+
+    with django_assert_num_queries(MATCH_HISTORY_QUERIES):
+        response = api.get(reverse('matches:match_history'))
+
+    assert response.status_code == 200
+    assert len(response.data['results']) == matches
@@ -0,0 +1,107 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from django.db import connection
+from matches.models import Match, Move
+from matches.serializers import BulkCreateMovesSerializer, CreateMoveSerializer
+from .factories import MatchFactory, MatchPlayerFactory
+
+WRITERS = 6
+SINGLE_MOVES = 4
+BULK_SIZE = 5
+
+
+def run_concurrently(*targets):
+    """Dispara as funções ao mesmo tempo, cada uma na sua thread (e conexão)"""
+    barrier = threading.Barrier(len(targets))
+    errors = []
+
+    def run(target):
+        try:
+            barrier.wait()
+            target()
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=run, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+@pytest.fixture
+def match():
+    match = MatchFactory()
+    MatchPlayerFactory(match=match, user=match.created_by, team='A', position=0)
+    MatchPlayerFactory(match=match, team='B', position=1)
+    return match
+
+
+def single_writer(match_id, player):
+    def write():
+        match = Match.objects.get(pk=match_id)
+        for _ in range(SINGLE_MOVES):
+            serializer = CreateMoveSerializer(
+                data={'move_type': 'normal', 'points': 1},
+                context={'match': match, 'player': player}
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+    return write
+
+
+def bulk_writer(match_id, players, batch):
+    def write():
+        match = Match.objects.get(pk=match_id)
+        moves = [{'move_type': 'normal', 'points': 1, 'description': batch} for _ in range(BULK_SIZE)]
+        serializer = BulkCreateMovesSerializer(
+            data={'moves': moves},
+            context={
+                'request': SimpleNamespace(user=match.created_by),
+                'match': match,
+                'players': players,
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+    return write
+
+
+def assert_turns_are_sequential(match, expected):
+    turns = list(Move.objects.filter(match=match).order_by('turn_number').values_list('turn_number', flat=True))
+    assert turns == list(range(1, expected + 1))
+    match.refresh_from_db()
+    assert match.next_turn == expected + 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_single_moves_get_distinct_sequential_turns(match):
+    players = list(match.match_players.all())
+    run_concurrently(*(
+        single_writer(match.pk, players[index % len(players)]) for index in range(WRITERS)
+    ))
+
+    assert_turns_are_sequential(match, WRITERS * SINGLE_MOVES)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_single_and_bulk_writers_share_one_sequence(match):
+    players = {player.user_id: player for player in match.match_players.all()}
+    creator_player = players[match.created_by_id]
+    run_concurrently(
+        *(single_writer(match.pk, creator_player) for _ in range(WRITERS // 2)),
+        *(bulk_writer(match.pk, players, f'lote {index}') for index in range(WRITERS // 2)),
+    )
+
+    assert_turns_are_sequential(match, WRITERS // 2 * (SINGLE_MOVES + BULK_SIZE))
+    # Cada lote recebe um bloco contíguo de turnos
+    batches = {}
+    for batch, turn in Move.objects.exclude(description='').values_list('description', 'turn_number'):
+        batches.setdefault(batch, []).append(turn)
+    assert len(batches) == WRITERS // 2
+    for turns in batches.values():
+        assert sorted(turns) == list(range(min(turns), min(turns) + BULK_SIZE))
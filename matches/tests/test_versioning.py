@@ -0,0 +1,49 @@
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from matches.models import MatchPlayer
+from matches.scoring import reconcile_points
+from .factories import MatchPlayerFactory, MoveFactory
+
+
+@pytest.fixture
+def player():
+    return MatchPlayerFactory()
+
+
+@pytest.mark.django_db
+def test_match_update_bumps_version(player):
+    match = player.match
+    match.refresh_from_db()
+    version = match.version
+    client = APIClient()
+    client.force_authenticate(match.created_by)
+
+    response = client.patch(
+        reverse('matches:match_detail', kwargs={'pk': match.pk}),
+        {'status': 'cancelada', 'ended_at': timezone.now().isoformat()},
+        format='json'
+    )
+
+    assert response.status_code == 200
+    match.refresh_from_db()
+    assert match.status == 'cancelada'
+    assert match.version == version + 1
+
+
+@pytest.mark.django_db
+def test_reconcile_points_bumps_version_of_corrected_matches(player):
+    MoveFactory(player=player, points=3)
+    other = MatchPlayerFactory()
+    MatchPlayer.objects.filter(pk=player.pk).update(points=0)
+    match, other_match = player.match, other.match
+    match.refresh_from_db()
+    other_match.refresh_from_db()
+    versions = match.version, other_match.version
+
+    assert reconcile_points() == 1
+
+    match.refresh_from_db()
+    other_match.refresh_from_db()
+    assert (match.version, other_match.version) == (versions[0] + 1, versions[1])
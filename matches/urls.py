@@ -16,9 +16,21 @@ urlpatterns = [
     # Adicionar jogada
     path('<uuid:match_id>/moves/', views.add_move, name='add_move'),
     
+    # Adicionar lote de jogadas
+    path('<uuid:match_id>/moves/bulk/', views.add_moves_bulk, name='add_moves_bulk'),
+    
+    # Placar turno a turno
+    path('<uuid:match_id>/timeline/', views.match_timeline, name='match_timeline'),
+    
     # Estatísticas de partidas do usuário
     path('stats/', views.match_stats, name='match_stats'),
     
     # Histórico de partidas
     path('history/', views.MatchHistoryView.as_view(), name='match_history'),
+    
+    # Exportação do histórico completo (streaming)
+    path('history/export/', views.export_match_history, name='export_match_history'),
+    
+    # Importação de partidas em lote (torneios offline)
+    path('import/', views.import_match_history, name='import_match_history'),
 ]
\ No newline at end of file
@@ -1,27 +1,40 @@
 from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from django.db.models import Avg, Count, Q, Max, Min
+from django.core.cache import cache
+from django.db.models import Count, Q, Max, Min, OuterRef, Subquery
 from django.utils import timezone
-from django.db import models
+from django.db import models, transaction
+from .export import EXPORT_FORMATS, export_history
+from .importer import IMPORT_FORMATS, MatchImportError, import_matches, load_matches, parse_json
+from .lifecycle import complete_match
 from .models import Match, MatchPlayer, Move
+from .pagination import MatchPagination
 from .serializers import (
     MatchSerializer,
     MatchListSerializer,
     MoveSerializer,
     CreateMoveSerializer,
+    BulkCreateMovesSerializer,
     MatchStatsSerializer
 )
-from core.achievement_engine import achievement_engine
+from core.achievement_engine import move_event
+from core.idempotency import idempotent
+from core.replay import MatchReplay
+from core.tasks import schedule_moves_evaluation, schedule_user_evaluation
+from accounts.models import UserStats
+from accounts.stats import MATCH_STATS_CACHE_TIMEOUT, match_stats_cache_key
 
 
 class MatchListCreateView(generics.ListCreateAPIView):
     """Lista e cria partidas"""
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MatchPagination
     filterset_fields = ['status']
     search_fields = ['created_by__display_name']
-    ordering = ['-started_at']
+    ordering = ['-started_at', '-id']
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -31,9 +44,11 @@ class MatchListCreateView(generics.ListCreateAPIView):
     def get_queryset(self):
         user = self.request.user
         # Retorna partidas onde o usuário é criador ou participante
-        return Match.objects.filter(
-            Q(created_by=user) | Q(match_players__user=user)
-        ).distinct()
+        # (subconsulta em vez de JOIN + DISTINCT, que encarece a contagem e a paginação)
+        queryset = Match.objects.filter(
+            Q(created_by=user) | Q(pk__in=MatchPlayer.objects.filter(user=user).values('match_id'))
+        )
+        return self.get_serializer_class().setup_queryset(queryset)
 
 
 class MatchDetailView(generics.RetrieveUpdateAPIView):
@@ -43,13 +58,16 @@ class MatchDetailView(generics.RetrieveUpdateAPIView):
     
     def get_queryset(self):
         user = self.request.user
-        return Match.objects.filter(
-            Q(created_by=user) | Q(match_players__user=user)
-        ).distinct()
+        return MatchSerializer.setup_queryset(
+            Match.objects.filter(
+                Q(created_by=user) | Q(match_players__user=user)
+            ).distinct()
+        )
 
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent
 def finish_match(request, match_id):
     """Finaliza uma partida e avalia conquistas"""
     match = get_object_or_404(Match, id=match_id)
@@ -68,45 +86,27 @@ def finish_match(request, match_id):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Finaliza a partida
-    match.status = 'finalizada'
-    match.ended_at = timezone.now()
-    
-    # Calcula duração
-    if match.started_at and match.ended_at:
-        duration = match.ended_at - match.started_at
-        match.duration_minutes = int(duration.total_seconds() / 60)
-    
-    match.save()
-    
-    # Avalia conquistas
-    unlocked_achievements = achievement_engine.evaluate_match_achievements(match)
-    
-    # Prepara resposta com conquistas desbloqueadas
-    achievements_data = []
-    for achievement_data in unlocked_achievements:
-        from achievements.serializers import UserAchievementSerializer
-        achievements_data.append({
-            'user': achievement_data['user'].display_name,
-            'achievement': {
-                'name': achievement_data['achievement'].name,
-                'description': achievement_data['achievement'].description,
-                'category': achievement_data['achievement'].category,
-                'points': achievement_data['achievement'].points
-            }
-        })
+    with transaction.atomic():
+        match.ended_at = timezone.now()
+        match.duration_minutes = None
+        complete_match(match)
+    
+    match = MatchSerializer.setup_queryset(Match.objects.filter(pk=match.pk)).get()
     
     return Response({
         'message': 'Partida finalizada com sucesso!',
-        'match': MatchSerializer(match).data,
-        'unlocked_achievements': achievements_data
+        'match': MatchSerializer(match).data
     })
 
 
-@api_view(['POST'])
+@api_view(['GET', 'POST'])
 @permission_classes([permissions.IsAuthenticated])
+@idempotent
 def add_move(request, match_id):
-    """Adiciona uma jogada à partida"""
+    """Lista as jogadas novas (GET) ou adiciona uma jogada à partida (POST)"""
+    if request.method == 'GET':
+        return _list_moves_since(request, match_id)
+    
     match = get_object_or_404(Match, id=match_id)
     user = request.user
     
@@ -134,43 +134,185 @@ def add_move(request, match_id):
     if serializer.is_valid():
         move = serializer.save()
         
-        # Avalia conquistas após cada jogada
-        unlocked_achievements = achievement_engine.evaluate_user_achievements(user, match)
+        # Avalia em segundo plano apenas as conquistas disparadas por este tipo de jogada
+        schedule_user_evaluation(user, match, move_event(move.move_type))
         
         response_data = {
             'move': MoveSerializer(move).data,
             'player_points': player.points
         }
         
-        if unlocked_achievements:
-            from achievements.serializers import UserAchievementSerializer
-            response_data['unlocked_achievements'] = [
-                {
-                    'achievement': {
-                        'name': ach['achievement'].name,
-                        'description': ach['achievement'].description,
-                        'category': ach['achievement'].category
-                    }
-                } for ach in unlocked_achievements
-            ]
-        
         return Response(response_data, status=status.HTTP_201_CREATED)
     
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _list_moves_since(request, match_id):
+    """Jogadas posteriores a ?after_turn=N e placar atual, com ETag pela versão da partida.
+
+    Um poll sem alterações (If-None-Match igual à versão) custa uma consulta e retorna 304.
+    """
+    user = request.user
+    
+    try:
+        after_turn = int(request.query_params.get('after_turn', 0))
+    except ValueError:
+        return Response(
+            {'error': 'Parâmetro after_turn inválido'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Versão e permissão em uma única consulta pela chave primária
+    match = Match.objects.filter(
+        Q(created_by=user) | Q(pk__in=MatchPlayer.objects.filter(user=user).values('match_id')),
+        pk=match_id
+    ).only('id', 'status', 'version').first()
+    if match is None:
+        return Response(
+            {'error': 'Partida não encontrada'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    
+    etag = f'"{match.pk}-{match.version}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+    
+    moves = Move.objects.filter(
+        match=match,
+        turn_number__gt=after_turn
+    ).select_related('player__user').order_by('turn_number')
+    
+    data = {
+        'version': match.version,
+        'status': match.status,
+        'moves': MoveSerializer(moves, many=True).data,
+        'player_points': {
+            str(user_id): points
+            for user_id, points in match.match_players.values_list('user_id', 'points')
+        }
+    }
+    return Response(data, headers={'ETag': etag})
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+@idempotent
+def add_moves_bulk(request, match_id):
+    """Adiciona um lote ordenado de jogadas (de um ou mais jogadores) à partida"""
+    match = get_object_or_404(Match, id=match_id)
+    user = request.user
+    
+    if match.status != 'em_andamento':
+        return Response(
+            {'error': 'Não é possível adicionar jogadas a uma partida finalizada'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    players = {player.user_id: player for player in match.match_players.select_related('user')}
+    
+    # O criador da partida pode registrar jogadas de todos (placar da mesa);
+    # os demais participantes, apenas as próprias (validado no serializer)
+    if match.created_by_id != user.pk and user.pk not in players:
+        return Response(
+            {'error': 'Você não é participante desta partida'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    serializer = BulkCreateMovesSerializer(
+        data=request.data,
+        context={'request': request, 'match': match, 'players': players}
+    )
+    
+    if serializer.is_valid():
+        moves = serializer.save()
+        
+        # Uma única avaliação para o lote inteiro
+        schedule_moves_evaluation(
+            match,
+            {move.player.user_id for move in moves},
+            {move_event(move.move_type) for move in moves}
+        )
+        
+        return Response({
+            'moves': MoveSerializer(moves, many=True).data,
+            'player_points': {str(player.user_id): player.points for player in players.values()}
+        }, status=status.HTTP_201_CREATED)
+    
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def match_timeline(request, match_id):
+    """Estado da partida turno a turno (placar, liderança e sequências)"""
+    match = get_object_or_404(Match, id=match_id)
+    user = request.user
+    
+    if match.created_by != user and not match.match_players.filter(user=user).exists():
+        return Response(
+            {'error': 'Você não tem permissão para ver esta partida'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    replay = MatchReplay()
+    turns = [state.as_dict() for state in replay.stream(match)]
+    
+    return Response({
+        'match_id': match.id,
+        'turns': turns,
+        'summary': {
+            'scores': replay.scores,
+            'leader': replay.leader,
+            'lead_changes': replay.lead_changes,
+            'max_deficit': replay.max_deficit,
+            'best_run': {str(player_id): run for player_id, run in replay.best_run.items()},
+        }
+    })
+
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def match_stats(request):
-    """Estatísticas de partidas do usuário"""
+    """Estatísticas de partidas do usuário (em cache até a próxima escrita do usuário)"""
     user = request.user
+    cache_key = match_stats_cache_key(user.pk)
     
-    # Partidas do usuário
-    user_matches = MatchPlayer.objects.filter(user=user)
-    total_matches = user_matches.count()
+    data = cache.get(cache_key)
+    if data is None:
+        data = _compute_match_stats(user)
+        cache.set(cache_key, data, MATCH_STATS_CACHE_TIMEOUT)
+    
+    return Response(data)
+
+
+def _compute_match_stats(user):
+    """Totais desnormalizados, tipo de jogada favorito e durações em uma única consulta"""
+    finished = MatchPlayer.objects.filter(
+        user_id=OuterRef('user_id'),
+        match__status='finalizada',
+        match__duration_minutes__isnull=False
+    ).order_by().values('user_id')
+    favorite_move = Move.objects.filter(
+        player__user_id=OuterRef('user_id')
+    ).order_by().values('move_type').annotate(
+        count=Count('id')
+    ).order_by('-count', 'move_type').values('move_type')[:1]
+    
+    stats_rows = UserStats.objects.filter(user=user).annotate(
+        longest_duration=Subquery(finished.annotate(value=Max('match__duration_minutes')).values('value')),
+        shortest_duration=Subquery(finished.annotate(value=Min('match__duration_minutes')).values('value')),
+        favorite_move_type=Subquery(favorite_move)
+    )
+    stats = stats_rows.first()
+    if stats is None:
+        # Linha ainda inexistente: recalcula a partir das tabelas de origem
+        user.get_stats()
+        stats = stats_rows.first()
+    
+    total_matches = stats.total_matches
     
     if total_matches == 0:
-        return Response({
+        return {
             'total_matches': 0,
             'wins': 0,
             'losses': 0,
@@ -180,66 +322,84 @@ def match_stats(request):
             'favorite_move_type': None,
             'longest_match_duration': 0,
             'shortest_match_duration': 0
-        })
-    
-    # Vitórias e derrotas
-    wins = user_matches.filter(is_winner=True).count()
-    losses = total_matches - wins
-    win_rate = (wins / total_matches) * 100
-    
-    # Pontos médios
-    average_points = user_matches.aggregate(avg_points=Avg('points'))['avg_points'] or 0
-    
-    # Total de jogadas
-    total_moves = Move.objects.filter(player__user=user).count()
-    
-    # Tipo de jogada favorito
-    favorite_move = Move.objects.filter(
-        player__user=user
-    ).values('move_type').annotate(
-        count=Count('move_type')
-    ).order_by('-count').first()
-    
-    favorite_move_type = favorite_move['move_type'] if favorite_move else None
-    
-    # Duração das partidas
-    finished_matches = Match.objects.filter(
-        match_players__user=user,
-        status='finalizada',
-        duration_minutes__isnull=False
-    )
-    
-    longest_duration = finished_matches.aggregate(
-        max_duration=Max('duration_minutes')
-    )['max_duration'] or 0
-    
-    shortest_duration = finished_matches.aggregate(
-        min_duration=Min('duration_minutes')
-    )['min_duration'] or 0
+        }
     
-    data = {
+    return {
         'total_matches': total_matches,
-        'wins': wins,
-        'losses': losses,
-        'win_rate': round(win_rate, 2),
-        'average_points': round(average_points, 2),
-        'total_moves': total_moves,
-        'favorite_move_type': favorite_move_type,
-        'longest_match_duration': longest_duration,
-        'shortest_match_duration': shortest_duration
+        'wins': stats.total_wins,
+        'losses': total_matches - stats.total_wins,
+        'win_rate': round(stats.win_rate, 2),
+        'average_points': round(stats.total_points / total_matches, 2),
+        'total_moves': stats.total_moves,
+        'favorite_move_type': stats.favorite_move_type,
+        'longest_match_duration': stats.longest_duration or 0,
+        'shortest_match_duration': stats.shortest_duration or 0
     }
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def export_match_history(request):
+    """Exporta todo o histórico de partidas do usuário em streaming (?output=ndjson|csv)"""
+    output = request.query_params.get('output', 'ndjson')
+    if output not in EXPORT_FORMATS:
+        return Response(
+            {'error': f'Formato inválido. Use: {", ".join(EXPORT_FORMATS)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
-    return Response(data)
+    content_type = 'text/csv' if output == 'csv' else 'application/x-ndjson'
+    response = StreamingHttpResponse(export_history(request.user, output), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="historico-partidas.{output}"'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAdminUser])
+def import_match_history(request):
+    """Importa partidas finalizadas em lote (torneios offline).
+
+    Aceita um arquivo em `file` (JSON ou CSV, ?input=json|csv) ou o JSON
+    {"matches": [...]} no corpo da requisição.
+    """
+    upload = request.FILES.get('file')
+    try:
+        if upload is not None:
+            input_format = request.query_params.get('input') or (
+                'csv' if upload.name.lower().endswith('.csv') else 'json'
+            )
+            if input_format not in IMPORT_FORMATS:
+                return Response(
+                    {'error': f'Formato inválido. Use: {", ".join(IMPORT_FORMATS)}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            data = load_matches(upload, input_format)
+        else:
+            data = parse_json(request.data)
+        matches = import_matches(data, created_by=request.user)
+    except MatchImportError as exc:
+        return Response(
+            {'error': 'Arquivo de importação inválido', 'details': exc.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return Response({
+        'imported': len(matches),
+        'match_ids': [str(match.pk) for match in matches]
+    }, status=status.HTTP_201_CREATED)
 
 
 class MatchHistoryView(generics.ListAPIView):
     """Histórico de partidas do usuário"""
     serializer_class = MatchListSerializer
     permission_classes = [permissions.IsAuthenticated]
-    ordering = ['-started_at']
+    pagination_class = MatchPagination
+    ordering = ['-started_at', '-id']
     
     def get_queryset(self):
         user = self.request.user
-        return Match.objects.filter(
-            match_players__user=user
-        ).distinct()
\ No newline at end of file
+        return MatchListSerializer.setup_queryset(
+            Match.objects.filter(
+                pk__in=MatchPlayer.objects.filter(user=user).values('match_id')
+            )
+        )
\ No newline at end of file